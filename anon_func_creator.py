@@ -1,51 +1,386 @@
 import re
-import inspect
+import sys
+import ast
+import math
+import types
+import builtins
+import numbers
+import operator
+import threading
+import functools
+import collections
+import collections.abc
 
+import numpy as np
 
-def create_func(string):
+
+ArrayResult = collections.namedtuple('ArrayResult', ['values', 'path'])
+VECTORIZED = 'vectorized'
+PER_ELEMENT = 'per_element'
+
+# how the caller's local variables are bound: their values when the function is created, or when it is called
+SNAPSHOT = 'snapshot'
+LIVE = 'live'
+
+# functions that have a numpy equivalent working on whole arrays
+UFUNCS = {
+    abs: np.abs, min: np.minimum, max: np.maximum, round: np.round,
+    math.sqrt: np.sqrt, math.exp: np.exp, math.expm1: np.expm1, math.log: np.log, math.log2: np.log2,
+    math.log10: np.log10, math.log1p: np.log1p, math.sin: np.sin, math.cos: np.cos, math.tan: np.tan,
+    math.asin: np.arcsin, math.acos: np.arccos, math.atan: np.arctan, math.atan2: np.arctan2,
+    math.sinh: np.sinh, math.cosh: np.cosh, math.tanh: np.tanh, math.asinh: np.arcsinh,
+    math.acosh: np.arccosh, math.atanh: np.arctanh, math.floor: np.floor, math.ceil: np.ceil,
+    math.trunc: np.trunc, math.fabs: np.fabs, math.hypot: np.hypot, math.copysign: np.copysign,
+    math.degrees: np.degrees, math.radians: np.radians, math.isnan: np.isnan, math.isinf: np.isinf,
+    math.isfinite: np.isfinite,
+}
+# functions that return ints in python (round only without ndigits), while their ufuncs keep floats
+INTEGER_FUNCS = {round, math.floor, math.ceil, math.trunc}
+# the name the numpy functions are passed to the vectorized function as
+NUMPY_NAME = '__numpy__'
+# integer operators whose results may not fit in the arrays' dtype (or that raise in python, like negative shifts)
+CHECKED_OPERATORS = {ast.Add: 'add', ast.Sub: 'sub', ast.Mult: 'mul', ast.Pow: 'pow', ast.LShift: 'lshift',
+                     ast.RShift: 'rshift', ast.USub: 'neg'}
+# integer results at least this large may have overflowed
+INTEGER_LIMIT = 2.0 ** 62
+# how many compiled expressions are kept
+CACHE_SIZE = 256
+
+
+class _ArrayFunctions:
+    """
+    The numpy functions vectorized expressions call (as NUMPY_NAME), and checked integer operators,
+    which raise OverflowError rather than wrap around like numpy's do
+    """
+    def __getattr__(self, name):
+        return getattr(np, name)
+
+    @staticmethod
+    def checked(name, *operands):
+        result = getattr(operator, name)(*operands)
+        if np.issubdtype(np.result_type(result), np.integer):
+            operands = [np.asarray(operand, dtype=np.float64) for operand in operands]
+            if name in ('lshift', 'rshift'):
+                a, b = operands
+                if np.any(b < 0):
+                    raise ValueError("negative shift count")
+                exact = a * 2.0 ** (b if name == 'lshift' else -b)
+            else:
+                exact = getattr(operator, name)(*operands)
+            if np.any(np.abs(exact) >= INTEGER_LIMIT):
+                raise OverflowError("integer {0} overflows".format(name))
+        return result
+
+    @staticmethod
+    def integer(values):
+        """the ints python's round, floor, ceil and trunc return, or OverflowError for ones int64 can't hold"""
+        values = np.asarray(values)
+        if np.issubdtype(values.dtype, np.integer):
+            return values
+        if not np.all(np.abs(values) < INTEGER_LIMIT):
+            raise OverflowError("cannot convert to integer")
+        return values.astype(np.int64)
+
+
+_ARRAY_FUNCTIONS = _ArrayFunctions()
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+class _Vectorizer(ast.NodeTransformer):
+    """
+    Rewrites an expression to work on whole arrays: known functions are replaced by their ufuncs,
+    integer arithmetic that may overflow by checked operators, and boolean operators,
+    chained comparisons and conditional expressions by their numpy equivalents.
+    Raises NotVectorizable for anything else that numpy can't evaluate element-wise.
+    """
+    allowed = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Name, ast.Constant, ast.Load,
+               ast.operator, ast.unaryop, ast.cmpop)
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    def generic_visit(self, node):
+        if not isinstance(node, self.allowed) or isinstance(node, (ast.MatMult, ast.Is, ast.IsNot, ast.In, ast.NotIn)):
+            raise NotVectorizable(type(node).__name__)
+        return super().generic_visit(node)
+
+    @staticmethod
+    def _numpy_call(name, args):
+        func = ast.Attribute(value=ast.Name(id=NUMPY_NAME, ctx=ast.Load()), attr=name, ctx=ast.Load())
+        return ast.Call(func=func, args=args, keywords=[])
+
+    def _resolve(self, node):
+        if isinstance(node, ast.Name):
+            if node.id in self.scope:
+                return self.scope[node.id]
+            if hasattr(builtins, node.id):
+                return getattr(builtins, node.id)
+        elif isinstance(node, ast.Attribute):
+            return getattr(self._resolve(node.value), node.attr)
+        raise NotVectorizable(ast.unparse(node))
+
+    def visit_Call(self, node):
+        try:
+            func = self._resolve(node.func)
+            ufunc = UFUNCS.get(func, func) if not isinstance(func, np.ufunc) else func
+        except (AttributeError, TypeError):
+            raise NotVectorizable(ast.unparse(node.func)) from None
+        if isinstance(ufunc, np.ufunc):
+            num_args = (ufunc.nin,)
+        else:
+            # round(x) or round(x, ndigits)
+            num_args = (1, 2) if ufunc is np.round else ()
+        if len(node.args) not in num_args or node.keywords:
+            raise NotVectorizable(ast.unparse(node))
+        call = self._numpy_call(ufunc.__name__, [self.visit(arg) for arg in node.args])
+        if func in INTEGER_FUNCS and len(node.args) == 1:
+            return self._numpy_call('integer', [call])
+        return call
+
+    def visit_Attribute(self, node):
+        # numeric constants like math.pi, which are still looked up whenever the function is called
+        try:
+            value = self._resolve(node)
+        except (AttributeError, TypeError):
+            raise NotVectorizable(ast.unparse(node)) from None
+        if not isinstance(value, numbers.Number):
+            raise NotVectorizable(ast.unparse(node))
+        return node
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.op, ast.Not):
+            return self._numpy_call('logical_not', [self.visit(node.operand)])
+        if type(node.op) in CHECKED_OPERATORS:
+            return self._checked(node.op, [node.operand])
+        return self.generic_visit(node)
+
+    def visit_BinOp(self, node):
+        if type(node.op) not in CHECKED_OPERATORS:
+            return self.generic_visit(node)
+        return self._checked(node.op, [node.left, node.right])
+
+    def _checked(self, op, operands):
+        name = ast.Constant(value=CHECKED_OPERATORS[type(op)])
+        return self._numpy_call('checked', [name] + [self.visit(operand) for operand in operands])
+
+    def visit_BoolOp(self, node):
+        # like python, a and b is a if a is falsy else b, and a or b is a if a is truthy else b
+        if isinstance(node.op, ast.And):
+            combine = lambda a, b: self._numpy_call('where', [a, b, a])
+        else:
+            combine = lambda a, b: self._numpy_call('where', [a, a, b])
+        return functools.reduce(combine, [self.visit(value) for value in node.values])
+
+    def visit_Compare(self, node):
+        operands = [self.visit(node.left)] + [self.visit(operand) for operand in node.comparators]
+        comparisons = []
+        for left, op, right in zip(operands, node.ops, operands[1:]):
+            self.generic_visit(op)
+            comparisons.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+        return functools.reduce(lambda a, b: self._numpy_call('logical_and', [a, b]), comparisons)
+
+    def visit_IfExp(self, node):
+        return self._numpy_call('where', [self.visit(node.test), self.visit(node.body), self.visit(node.orelse)])
+
+
+def vectorize_expression(string, scope):
+    """
+    Returns the expression rewritten to be evaluated once over whole arrays
+    (with the numpy functions it calls taken from NUMPY_NAME)
+    Raises NotVectorizable if it can't be
+    """
+    tree = _Vectorizer(scope).visit(ast.parse(string, mode='eval'))
+    return ast.unparse(ast.fix_missing_locations(tree))
+
+
+class LiveLocals(collections.abc.Mapping):
+    """
+    A read-only view of some of the local variables of a frame, as they are when they are read
+    (keeping the frame, and so all its locals, alive)
+    """
+    def __init__(self, frame, names):
+        self._frame = frame
+        self._names = tuple(names)
+
+    def __getitem__(self, name):
+        if name not in self._names:
+            raise KeyError(name)
+        return self.getter((name,))()[0]
+
+    def __iter__(self):
+        f_locals = self._frame.f_locals
+        return (name for name in self._names if name in f_locals)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def getter(self, names):
+        """returns a function that reads the current values of names at once"""
+        frame = self._frame
+
+        def get():
+            f_locals = frame.f_locals
+            try:
+                return tuple(f_locals[name] for name in names)
+            except KeyError as e:
+                raise NameError("local variable {0!r} is not bound".format(e.args[0])) from None
+        return get
+
+
+class Func:
+    def __init__(self, string, func, globals_=None, locals_=None):
+        self._string = string
+        self._func = func
+        self._globals = globals_ if globals_ is not None else {}
+        self._locals = locals_ if locals_ is not None else {}
+        self._array_func = None
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return self._string
+
+    def __repr__(self):
+        return self._string
+
+    def __call__(self, *args):
+        return self._func(*args)
+
+    def _get_array_func(self):
+        """returns a function evaluating the expression over whole arrays, or None if there is none"""
+        with self._lock:
+            if self._array_func is None:
+                try:
+                    string = vectorize_expression(self._string, dict(self._globals, **self._locals))
+                except NotVectorizable:
+                    self._array_func = False
+                else:
+                    self._array_func = _make_function(string, self._locals, self._globals)
+            return self._array_func or None
+
+    def over_arrays(self, *columns):
+        """
+        Evaluates the function over whole arrays (broadcast together) at once.
+        Arithmetic, comparisons, boolean operators, conditional expressions and known math functions
+        are mapped to numpy; any other expression, or one numpy would compute differently than python
+        (division by zero, integer overflow), is evaluated element by element.
+        Input:
+            columns - An array (or a scalar) for every argument
+        Output:
+            An ArrayResult of the array of values, and the path it was computed in (VECTORIZED or PER_ELEMENT)
+        """
+        columns = [np.asarray(column) for column in columns]
+        shape = np.broadcast_shapes(*(column.shape for column in columns))
+        array_func = self._get_array_func()
+        if array_func is not None:
+            try:
+                # numpy only warns where python raises, so make it raise too, and evaluate element by element
+                with np.errstate(all='raise'):
+                    values = np.asarray(array_func(*columns))
+            except Exception:
+                pass
+            else:
+                if values.shape == shape:
+                    return ArrayResult(values, VECTORIZED)
+                if values.ndim == 0:
+                    return ArrayResult(np.full(shape, values), VECTORIZED)
+        if not columns:
+            return ArrayResult(np.asarray(self._func()), PER_ELEMENT)
+        values = np.frompyfunc(self._func, len(columns), 1)(*columns)
+        return ArrayResult(np.array(values.tolist()) if isinstance(values, np.ndarray) else np.asarray(values),
+                           PER_ELEMENT)
+
+
+def _code_names(code):
+    """returns all the names used by code, including in nested lambdas and comprehensions"""
+    names = set(code.co_names) | set(code.co_varnames) | set(code.co_freevars)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _num_args(names):
+    """returns the number of arguments, by the largest of _ (same as _1), _1, _2, etc... used"""
+    args = [name[1:] for name in names if re.fullmatch(r'_\d*', name)]
+    return max((int(arg) if arg else 1 for arg in args), default=0)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _expression_names(string):
+    return frozenset(_code_names(compile(string, '', 'eval')))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _compile_factory(string, local_names, live=False):
+    """
+    Compiles the code of a function that takes the numpy functions (as NUMPY_NAME) and the given caller locals
+    (or, if live, a function returning their current values), and returns a function of _1, _2, etc...
+    evaluating string
+    """
+    names = _expression_names(string)
+    params = ['_{0}'.format(i + 1) for i in range(_num_args(names))]
+    body = ''
+    if live and local_names:
+        body += '        {0}, = __scope__()\n'.format(', '.join(local_names))
+    if '_' in names:
+        body += '        _ = _1\n'
+    factory_params = [NUMPY_NAME] + (['__scope__'] if live else list(local_names))
+    source = 'def factory({0}):\n    def func({1}):\n{2}        return ({3}\n)\n    return func\n'.format(
+        ', '.join(factory_params), ', '.join(params), body, string)
+    module = compile(source, '<create_func {0!r}>'.format(string), 'exec')
+    return next(const for const in module.co_consts if isinstance(const, types.CodeType))
+
+
+def _make_function(string, local_values, globals_):
+    """
+    returns a function of _1, _2, etc... evaluating string in the given scope
+    (bound to the current values of the locals, unless they are LiveLocals)
+    """
+    if isinstance(local_values, LiveLocals):
+        local_names = local_values._names
+        factory = types.FunctionType(_compile_factory(string, local_names, live=True), globals_)
+        return factory(_ARRAY_FUNCTIONS, local_values.getter(local_names))
+    local_names = tuple(sorted(local_values))
+    factory = types.FunctionType(_compile_factory(string, local_names), globals_)
+    return factory(_ARRAY_FUNCTIONS, *(local_values[name] for name in local_names))
+
+
+def create_func(string, binding=SNAPSHOT):
     """
     Creates an 'annonymous' function
     Input:
         string - A string to eval. Use _1, _2, etc... for variables names.
+        binding - SNAPSHOT to use the values the caller's local variables have now,
+                  or LIVE to use the values they have whenever the function is called.
+                  Global variables are always live.
     Output:
         A function. The number of arguments of the function depends on the variables you used in the string.
+        It never modifies the caller's variables, so it may be called from several threads at once.
     Example:
         >>> f = create_func('_1 + _2*_3')
         >>> f(7, 5, 2)
         17
     """
-    matches = re.findall('_\d*', string)
-    curframe = inspect.currentframe()
-    calframe = inspect.getouterframes(curframe, 2)
-    caller_locals = calframe[1][0].f_locals
-    caller_globals = calframe[1][0].f_globals
-    compiled_string = compile(string, '', 'eval')
-    if len(matches) == 0:
-        def func():
-            return eval(compiled_string, caller_globals, caller_locals)
+    if binding not in (SNAPSHOT, LIVE):
+        raise ValueError("binding must be {0!r} or {1!r}, not {2!r}".format(SNAPSHOT, LIVE, binding))
+    frame = sys._getframe(1)
+    caller_globals = frame.f_globals
+    names = {name for name in _expression_names(string) if not re.fullmatch(r'_\d*', name)}
+    if frame.f_locals is caller_globals:
+        # called at module level, where there are only globals
+        local_values = {}
+    elif binding == LIVE:
+        code = frame.f_code
+        local_names = names & set(code.co_varnames + code.co_cellvars + code.co_freevars)
+        local_values = LiveLocals(frame, sorted(local_names))
     else:
-        num_args = max(map(lambda x: int(x) if x else 1, map(lambda x: x.replace('_', ''), matches)))
-
-        def func(*args):
-            if len(args) != num_args:
-                raise TypeError("func() takes {0} positional arguments but {1} was given".format(num_args, len(args)))
-            new_locals = caller_locals
-            new_locals['_'] = args[0]
-            for i, arg in enumerate(args):
-                new_locals['_{0}'.format(i+1)] = arg
-            return eval(compiled_string, caller_globals, new_locals)
-
-    class Func:
-        def __str__(self):
-            return string
-
-        def __repr__(self):
-            return string
-
-        def __call__(self, *args):
-            return func(*args)
-
-    return Func()
+        caller_locals = frame.f_locals
+        local_values = {name: caller_locals[name] for name in names if name in caller_locals}
+    del frame
+    return Func(string, _make_function(string, local_values, caller_globals), caller_globals, local_values)
 
 
 if __name__ == "__main__":
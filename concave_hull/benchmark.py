@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""
+Benchmarks the concave hull pipeline:
+read_points -> get_alpha_shape -> order_edges -> edges_to_vertices -> polygon_area
+on synthetic point clouds, reporting the time and peak memory of every stage as JSON.
+
+    python -m concave_hull.benchmark --sizes 1e3 1e5 --output new.json --compare old.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import functools
+import tracemalloc
+
+import numpy as np
+
+from concave_hull import hull
+from concave_hull.containment import HullIndex
+
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+
+def uniform_cloud(size: int, random: np.random.RandomState) -> np.ndarray:
+    return random.rand(size, 2)
+
+
+def clustered_cloud(size: int, random: np.random.RandomState, num_clusters: int = 10) -> np.ndarray:
+    centers = random.rand(num_clusters, 2)
+    scales = random.uniform(0.01, 0.08, num_clusters)
+    cluster = random.randint(num_clusters, size=size)
+    return centers[cluster] + random.randn(size, 2) * scales[cluster, None]
+
+
+@functools.lru_cache(maxsize=None)
+def example_shape(name: str) -> HullIndex:
+    """
+    Returns an index of the alpha shape of one of the example files
+    """
+    with open(os.path.join(hull.DIR, 'examples', name)) as f:
+        points = hull.read_points_array(f)
+    return HullIndex(hull.get_alpha_shape(points, rings=True))
+
+
+def shaped_cloud(name: str, size: int, random: np.random.RandomState) -> np.ndarray:
+    """
+    Samples points uniformly inside the alpha shape of one of the example files
+    """
+    shape = example_shape(name)
+    chunks, found = [], 0
+    while found < size:
+        candidates = random.rand(max(2 * (size - found), 64), 2)
+        candidates = candidates[shape.contains(candidates)]
+        chunks.append(candidates)
+        found += len(candidates)
+    return np.concatenate(chunks)[:size]
+
+
+CLOUDS = {
+    'uniform': uniform_cloud,
+    'clustered': clustered_cloud,
+    'cshape': functools.partial(shaped_cloud, 'cshape-full'),
+    'hshape': functools.partial(shaped_cloud, 'hshape'),
+}
+
+
+def generate_cloud(kind: str, size: int, seed: int = 0) -> np.ndarray:
+    """
+    Generates a synthetic point cloud
+    :param kind: one of CLOUDS
+    :param size: the number of points
+    :param seed: the random seed
+    :return: a (size, 2) array
+    """
+    return CLOUDS[kind](size, np.random.RandomState(seed))
+
+
+def _measure(func: "callable", repeat: int, measure_memory: bool) -> "(object, dict)":
+    """
+    Runs func repeat times, and once more under tracemalloc (which slows it down) for its peak memory
+    :return: the stage's result, and a dict of its best time and peak memory
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start)
+    measurement = {'seconds': min(seconds), 'peak_bytes': None}
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            func()
+            measurement['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, measurement
+
+
+def run_pipeline(points: np.ndarray, engine: str = "numpy", repeat: int = 1, measure_memory: bool = True) -> dict:
+    """
+    Runs the pipeline stage by stage on points
+    :param points: an (N, 2) array
+    :param engine: the engine of get_alpha_shape
+    :param repeat: the number of timed runs of each stage (the best one is reported)
+    :param measure_memory: whether to also measure the peak memory of each stage
+    :return: a dict from every stage to its measurements
+    """
+    text = ''.join('{0!r} {1!r}\n'.format(x, y) for x, y in points.tolist())
+    stages = {}
+
+    points, stages['read_points'] = _measure(
+        lambda: hull.read_points_array(io.StringIO(text)), repeat, measure_memory)
+    indices, stages['get_alpha_shape'] = _measure(
+        lambda: hull.get_alpha_shape_edges(points, engine=engine), repeat, measure_memory)
+    vertices = [tuple(point) for point in points.tolist()]
+    edges = [(vertices[i], vertices[j]) for i, j in indices]
+    rings, stages['order_edges'] = _measure(lambda: hull.order_edge_rings(edges), repeat, measure_memory)
+    vertex_rings, stages['edges_to_vertices'] = _measure(
+        lambda: hull.edges_to_vertices(rings), repeat, measure_memory)
+    _, stages['polygon_area'] = _measure(lambda: hull.polygon_area(vertex_rings), repeat, measure_memory)
+    return stages
+
+
+def run(clouds: "list[str]", sizes: "list[int]", engine: str = "numpy", repeat: int = 1,
+        measure_memory: bool = True, seed: int = 0, log: "io.TextIOBase" = None) -> dict:
+    """
+    Benchmarks the pipeline on every kind and size of cloud
+    :return: a JSON-able dict of metadata and a list of results (one per cloud, size and stage)
+    """
+    results = []
+    for kind in clouds:
+        for size in sizes:
+            points = generate_cloud(kind, size, seed)
+            for stage, measurement in run_pipeline(points, engine, repeat, measure_memory).items():
+                results.append(dict(cloud=kind, size=size, stage=stage, **measurement))
+                if log is not None:
+                    log.write('{cloud:>10} {size:>10} {stage:>18} {seconds:10.4f}s {peak}\n'.format(
+                        peak='' if measurement['peak_bytes'] is None else '{0:.1f}MiB'.format(
+                            measurement['peak_bytes'] / 2 ** 20), **results[-1]))
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'engine': engine,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(old: dict, new: dict) -> "list[dict]":
+    """
+    Compares two benchmark runs
+    :return: for every (cloud, size, stage) in both runs, the ratio new / old of time and peak memory
+    """
+    def by_key(run):
+        return {(r['cloud'], r['size'], r['stage']): r for r in run['results']}
+
+    def ratio(new_value, old_value):
+        return new_value / old_value if new_value is not None and old_value else None
+
+    old_results = by_key(old)
+    comparison = []
+    for key, result in by_key(new).items():
+        if key in old_results:
+            comparison.append(dict(
+                cloud=key[0], size=key[1], stage=key[2],
+                seconds_ratio=ratio(result['seconds'], old_results[key]['seconds']),
+                peak_bytes_ratio=ratio(result['peak_bytes'], old_results[key]['peak_bytes'])))
+    return comparison
+
+
+def main(argv: "list[str]" = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clouds', nargs='+', choices=sorted(CLOUDS), default=sorted(CLOUDS))
+    parser.add_argument('--sizes', nargs='+', type=lambda size: int(float(size)), default=DEFAULT_SIZES)
+    parser.add_argument('--engine', choices=sorted(hull.ENGINES), default='numpy')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='measure_memory', action='store_false',
+                        help="don't measure peak memory (saves a traced run of every stage)")
+    parser.add_argument('--output', help="where to write the results as JSON (default: stdout)")
+    parser.add_argument('--compare', help="a previous JSON output to compare the results to")
+    args = parser.parse_args(argv)
+
+    results = run(args.clouds, args.sizes, args.engine, args.repeat, args.measure_memory, args.seed, log=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            results['comparison'] = compare(json.load(f), results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+import collections
+
+import numpy as np
+
+from concave_hull import hull
+
+
+CacheStats = collections.namedtuple('CacheStats', ['memory_hits', 'disk_hits', 'misses', 'seconds_saved'])
+
+
+def points_key(points: "list[(float, float)]", **params) -> str:
+    """
+    Returns a key identifying the points and the parameters they are computed with
+    :param points: A list (or an (N, 2) array) of 2d points
+    :param params: The parameters of the computation
+    :return: A hex digest
+    """
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((points.shape, sorted(params.items()))).encode())
+    digest.update(points.data)
+    return digest.hexdigest()
+
+
+class HullCache:
+    """
+    A cache of get_alpha_shape results, keyed by a hash of the points and the engine parameters.
+    Recently used results are kept in memory, and all results are stored as files in a directory,
+    which is kept under max_bytes by deleting the least recently used ones.
+    """
+
+    suffix = '.hull'
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 ** 2, memory_items: int = 128):
+        """
+        :param directory: Where the results are stored (created if missing)
+        :param max_bytes: The maximal total size of the stored results
+        :param memory_items: The number of results to also keep in memory
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_hits = self._disk_hits = self._misses = 0
+        self._seconds_saved = 0.0
+        self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        The number of hits (in each tier) and misses, and the compute time the hits saved
+        """
+        with self._lock:
+            return CacheStats(self._memory_hits, self._disk_hits, self._misses, self._seconds_saved)
+
+    def get_alpha_shape(self, points: "list[(float, float)]", engine: str = "numpy", alpha: float = None,
+                        rings: bool = False) -> "list[(float, float)]":
+        """
+        Same as hull.get_alpha_shape, but computed only if the same points and parameters weren't seen before.
+        """
+        key = points_key(points, engine=engine, alpha=alpha, rings=rings)
+        entry = self._get_from_memory(key)
+        if entry is None:
+            entry = self._get_from_disk(key)
+        if entry is None:
+            start = time.perf_counter()
+            result = hull.get_alpha_shape(points, engine=engine, alpha=alpha, rings=rings)
+            entry = (result, time.perf_counter() - start)
+            with self._lock:
+                self._misses += 1
+            self._put_on_disk(key, entry)
+            self._put_in_memory(key, entry)
+        return entry[0]
+
+    def clear(self) -> None:
+        """
+        Removes all the results (the stats are kept)
+        """
+        with self._lock:
+            self._memory.clear()
+        for path, _, _ in self._disk_entries():
+            self._remove(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _get_from_memory(self, key: str) -> tuple:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                self._seconds_saved += entry[1]
+        if entry is not None:
+            # the file is still used, so it shouldn't be evicted before the ones that aren't
+            self._touch(key)
+        return entry
+
+    def _put_in_memory(self, key: str, entry: tuple) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _get_from_disk(self, key: str) -> tuple:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            # the modification time orders the files for eviction
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        with self._lock:
+            self._disk_hits += 1
+            self._seconds_saved += entry[1]
+        self._put_in_memory(key, entry)
+        return entry
+
+    def _put_on_disk(self, key: str, entry: tuple) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, self._path(key))
+        with self._lock:
+            self._disk_bytes += size
+            over_limit = self._disk_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _disk_entries(self) -> "list[(str, float, int)]":
+        """
+        :return: (path, modification time, size) of every stored result
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,105 @@
+import numpy as np
+
+from concave_hull import hull
+
+
+class HullIndex:
+    """
+    Answers point-in-hull queries for a hull made of one or more rings (holes included),
+    using the even-odd rule.
+    The edges are bucketed into horizontal slabs, so a query only tests the edges of its own slab.
+
+    >>> index = HullIndex([[(0, 0), (4, 0), (4, 4), (0, 4)], [(1, 1), (2, 1), (2, 2), (1, 2)]])
+    >>> index.contains([(0.5, 0.5), (1.5, 1.5), (5, 5)]).tolist()
+    [True, False, False]
+    """
+
+    # the maximal number of (query, edge) pairs tested at once
+    block_size = 2 ** 20
+
+    def __init__(self, vertices: "list[(float, float)]", num_slabs: int = None):
+        """
+        :param vertices: The vertices of the hull, or a list of rings of vertices (as returned by get_alpha_shape)
+        :param num_slabs: The number of slabs to bucket the edges into, defaults to sqrt of the number of edges
+        """
+        rings = vertices if hull.is_multi_ring(vertices) else [vertices]
+        rings = [np.asarray(ring, dtype=np.float64).reshape(-1, 2) for ring in rings if len(ring)]
+        if rings:
+            starts = np.concatenate(rings)
+            ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+        else:
+            starts = ends = np.empty((0, 2))
+        # horizontal edges never cross a horizontal ray
+        crossing = starts[:, 1] != ends[:, 1]
+        self.starts, self.ends = starts[crossing], ends[crossing]
+        num_edges = len(self.starts)
+
+        if num_slabs is None:
+            num_slabs = int(np.sqrt(num_edges))
+        self.num_slabs = max(num_slabs, 1)
+        if num_edges:
+            self.min_y = min(self.starts[:, 1].min(), self.ends[:, 1].min())
+            self.max_y = max(self.starts[:, 1].max(), self.ends[:, 1].max())
+        else:
+            self.min_y, self.max_y = np.inf, -np.inf
+        self.slab_height = (self.max_y - self.min_y) / self.num_slabs if num_edges else 1.0
+
+        low = self._slab_of(np.minimum(self.starts[:, 1], self.ends[:, 1]))
+        high = self._slab_of(np.maximum(self.starts[:, 1], self.ends[:, 1]))
+        counts = high - low + 1
+        edges = np.repeat(np.arange(num_edges), counts)
+        slabs = np.repeat(low, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        order = np.argsort(slabs, kind='stable')
+        self.slab_edges = edges[order]
+        self.slab_offsets = np.concatenate([[0], np.cumsum(np.bincount(slabs, minlength=self.num_slabs))])
+
+    def _slab_of(self, y: np.ndarray) -> np.ndarray:
+        slabs = np.floor((y - self.min_y) / self.slab_height)
+        return np.clip(slabs, 0, self.num_slabs - 1).astype(np.int64)
+
+    def contains(self, points: "list[(float, float)]") -> np.ndarray:
+        """
+        Returns whether each point is inside the hull
+        :param points: A list (or an (N, 2) array) of 2d points
+        :return: An array of N booleans
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        inside = np.zeros(len(points), dtype=bool)
+        candidates = np.flatnonzero((points[:, 1] >= self.min_y) & (points[:, 1] <= self.max_y))
+        slabs = self._slab_of(points[candidates, 1])
+        order = np.argsort(slabs, kind='stable')
+        candidates, slabs = candidates[order], slabs[order]
+        bounds = np.searchsorted(slabs, np.arange(self.num_slabs + 1))
+        for slab in range(self.num_slabs):
+            queries = candidates[bounds[slab]:bounds[slab + 1]]
+            edges = self.slab_edges[self.slab_offsets[slab]:self.slab_offsets[slab + 1]]
+            if not len(queries) or not len(edges):
+                continue
+            step = max(self.block_size // len(edges), 1)
+            for i in range(0, len(queries), step):
+                block = queries[i:i + step]
+                inside[block] = self._crossings(points[block], edges) % 2 == 1
+        return inside
+
+    def _crossings(self, points: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """
+        Counts the edges crossed by a ray from every point to the right
+        """
+        x, y = points[:, [0]], points[:, [1]]
+        x1, y1 = self.starts[edges, 0], self.starts[edges, 1]
+        x2, y2 = self.ends[edges, 0], self.ends[edges, 1]
+        spans = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        return (spans & (x < crossing_x)).sum(axis=1)
+
+
+def points_in_hull(vertices: "list[(float, float)]", points: "list[(float, float)]") -> np.ndarray:
+    """
+    Returns whether each point is inside the hull
+    (build a HullIndex once instead, to query the same hull repeatedly)
+    :param vertices: The vertices of the hull, or a list of rings of vertices
+    :param points: A list (or an (N, 2) array) of 2d points
+    :return: An array of N booleans
+    """
+    return HullIndex(vertices).contains(points)
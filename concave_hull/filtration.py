@@ -0,0 +1,161 @@
+import collections
+
+import numpy as np
+
+from concave_hull import hull
+
+
+# an inner node of an _IntervalTree: the intervals containing center, sorted by start and by (descending) end,
+# and the subtrees of the intervals entirely before and after it
+_Node = collections.namedtuple('_Node', ['center', 'by_start', 'starts', 'by_end', 'negated_ends', 'left', 'right'])
+
+
+class _IntervalTree:
+    """
+    A centered interval tree of half-open [start, end) intervals, which finds the intervals containing a value
+    in O(log(N)^2 + the size of the output)
+    """
+    leaf_size = 64
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        """
+        :param starts: The starts of the intervals
+        :param ends: The ends of the intervals (empty intervals are never found)
+        """
+        self.starts = starts
+        self.ends = ends
+        self._root = self._build(np.flatnonzero(starts < ends))
+
+    def _build(self, indices: np.ndarray) -> "_Node | np.ndarray":
+        if len(indices) <= self.leaf_size:
+            return indices
+        starts, ends = self.starts[indices], self.ends[indices]
+        # the median start, which is in its (non empty) interval, so every node keeps at least one
+        center = np.partition(starts, len(starts) // 2)[len(starts) // 2]
+        left, right = ends <= center, starts > center
+        here = indices[~(left | right)]
+        by_start = here[np.argsort(self.starts[here], kind='stable')]
+        by_end = here[np.argsort(-self.ends[here], kind='stable')]
+        return _Node(center, by_start, self.starts[by_start], by_end, -self.ends[by_end],
+                     self._build(indices[left]), self._build(indices[right]))
+
+    def stab(self, value: float) -> np.ndarray:
+        """
+        Returns the intervals containing value
+        :param value: The value
+        :return: A sorted array of indices of intervals
+        """
+        found = []
+        node = self._root
+        while isinstance(node, _Node):
+            if value < node.center:
+                # all the intervals here end after center
+                found.append(node.by_start[:np.searchsorted(node.starts, value, side='right')])
+                node = node.left
+            else:
+                # all the intervals here start at or before center
+                found.append(node.by_end[:np.searchsorted(node.negated_ends, -value, side='left')])
+                node = node.right
+        found.append(node[(self.starts[node] <= value) & (value < self.ends[node])])
+        return np.sort(np.concatenate(found))
+
+
+class AlphaFiltration:
+    """
+    The full alpha complex of a point set: every Delaunay triangle and edge, with the alpha
+    at which it enters (and leaves) the alpha shape.
+    Built once per point set, after which the area or triangles at any alpha are answered with a binary search,
+    and the boundary edges with an interval tree query, without triangulating again.
+
+    >>> filtration = AlphaFiltration([(0, 0), (1, 0), (1, 1), (0, 1)])
+    >>> filtration.area(0.5), filtration.area(1)
+    (0.0, 1.0)
+    """
+
+    def __init__(self, points: "list[(float, float)]"):
+        """
+        :param points: A list (or an (N, 2) array) of 2d points
+        """
+        self.points = np.asarray(points, dtype=np.float64)
+        self._vertices = [tuple(point) for point in self.points.tolist()]
+        triangles, neighbors = hull.delaunay(self.points)
+        alphas = hull.triangle_alphas(self.points, triangles, neighbors)
+        self.best_alpha = hull.best_alpha(self.points, triangles, alphas)
+
+        order = np.argsort(alphas, kind='stable')
+        self.triangles = triangles[order]
+        self.triangle_alphas = alphas[order]
+        a, b, c = (self.points[self.triangles[:, i]] for i in range(3))
+        areas = ((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])) / 2.0
+        self._cumulative_areas = np.concatenate([[0.0], np.cumsum(areas)])
+        self._init_edges()
+
+    def _init_edges(self) -> None:
+        """
+        An edge is on the boundary of the shape from the alpha of its first triangle (its birth)
+        until the alpha of its second triangle (its death, inf for edges of the convex hull).
+        """
+        num_triangles = len(self.triangles)
+        directed = np.concatenate([self.triangles[:, [0, 1]], self.triangles[:, [1, 2]], self.triangles[:, [2, 0]]])
+        ranks = np.tile(np.arange(num_triangles), 3)
+        keys = directed.min(axis=1).astype(np.int64) * len(self.points) + directed.max(axis=1)
+        order = np.lexsort((ranks, keys))
+        keys, ranks, directed = keys[order], ranks[order], directed[order]
+        _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        births = self.triangle_alphas[ranks[first]]
+        deaths = np.full(len(first), np.inf)
+        shared = counts == 2
+        deaths[shared] = self.triangle_alphas[ranks[first[shared] + 1]]
+
+        order = np.argsort(births, kind='stable')
+        # every edge keeps the orientation of its first triangle, which is the one left in the shape
+        self.edges = directed[first][order]
+        self.edge_births = births[order]
+        self.edge_deaths = deaths[order]
+        self._edge_tree = _IntervalTree(self.edge_births, self.edge_deaths)
+
+    def _alpha_or_best(self, alpha: float) -> float:
+        return self.best_alpha if alpha is None else alpha
+
+    def triangles_at(self, alpha: float = None) -> np.ndarray:
+        """
+        Returns the triangles of the alpha shape
+        :param alpha: The alpha (radius), defaults to the best alpha
+        :return: A (T, 3) array of indices into points
+        """
+        alpha = self._alpha_or_best(alpha)
+        return self.triangles[:np.searchsorted(self.triangle_alphas, alpha, side='right')]
+
+    def edges_at(self, alpha: float = None) -> np.ndarray:
+        """
+        Returns the boundary edges of the alpha shape
+        :param alpha: The alpha (radius), defaults to the best alpha
+        :return: An (E, 2) array of indices into points
+        """
+        return self.edges[self._edge_tree.stab(self._alpha_or_best(alpha))]
+
+    def shape(self, alpha: float = None) -> "list[list[(float, float)]]":
+        """
+        Returns the alpha shape, like get_alpha_shape(points, alpha=alpha, rings=True) would
+        :param alpha: The alpha (radius), defaults to the best alpha
+        :return: A list of rings of vertices
+        """
+        edges = [(self._vertices[i], self._vertices[j]) for i, j in self.edges_at(alpha).tolist()]
+        return hull.edges_to_vertices(hull.order_edge_rings(edges))
+
+    def area(self, alpha: "float | np.ndarray" = None) -> "float | np.ndarray":
+        """
+        Returns the area of the alpha shape
+        :param alpha: The alpha (radius), or an array of them, defaults to the best alpha
+        :return: The area, or an array of areas
+        """
+        alpha = self._alpha_or_best(alpha)
+        areas = self._cumulative_areas[np.searchsorted(self.triangle_alphas, alpha, side='right')]
+        return float(areas) if np.ndim(areas) == 0 else areas
+
+    def area_curve(self) -> "(np.ndarray, np.ndarray)":
+        """
+        Returns the area as a (step) function of alpha
+        :return: The alphas where the area changes, and the area from each of them on
+        """
+        return self.triangle_alphas, self._cumulative_areas[1:]
@@ -4,8 +4,22 @@ import os
 from subprocess import Popen, PIPE, STDOUT
 import io
 import itertools
+import collections
+import functools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
+from matplotlib.artist import allow_rasterization
+from matplotlib.collections import PathCollection
+from matplotlib.markers import MarkerStyle
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+from matplotlib.transforms import IdentityTransform
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree, breadth_first_order
+from scipy.spatial import Delaunay
 
 
 DIR = os.path.dirname(__file__)
@@ -13,42 +27,380 @@ hull_path = os.path.join(DIR, "hull", "hull.exe")
 output_file = 'hout-alf'
 
 
-def get_alpha_shape(points: "list[(float, float)]") -> "list[(float, float)]":
+def get_alpha_shape(points: "list[(float, float)]", engine: str = "numpy", alpha: float = None,
+                    rings: bool = False) -> "list[(float, float)]":
     """
     Returns the concave hull around a given set of points.
-    (Calculates the "best" alpha automatically)
+    (Calculates the "best" alpha automatically, unless alpha is given)
+    :param points: A list (or an (N, 2) array) of 2d points
+    :param engine: "numpy" to compute the shape in process, "subprocess" to run the external hull program
+    :param alpha: The alpha (radius) to use, only supported by the numpy engine
+    :param rings: Whether to return every ring of the shape (for shapes with several components)
+    :return: The vertices of the alpha shape, or a list of rings of vertices if rings is True.
+    """
+    results_indices = get_alpha_shape_edges(points, engine=engine, alpha=alpha)
+    if isinstance(points, np.ndarray):
+        # only the vertices of the shape are converted to tuples
+        used = np.unique(np.asarray(results_indices, dtype=np.int64))
+        points = dict(zip(used.tolist(), map(tuple, points[used].tolist())))
+    edges = [(points[i], points[j]) for i, j in results_indices]
+    if rings:
+        return edges_to_vertices(order_edge_rings(edges))
+    return edges_to_vertices(order_edges(edges))
+
+
+def get_alpha_shapes(point_sets: "collections.Iterable[list[(float, float)]]", engine: str = "numpy",
+                     alpha: float = None, rings: bool = False, max_workers: int = None) -> "list[list[(float, float)]]":
+    """
+    Computes the alpha shapes of many point sets in parallel, using a pool of processes.
+    :param point_sets: An iterable of lists of 2d points
+    :param engine: The name of the engine to use (one of ENGINES)
+    :param alpha: The alpha (radius) to use, or None to choose the best one for every point set
+    :param rings: Whether to return every ring of each shape
+    :param max_workers: The number of processes to use (defaults to the number of CPUs)
+    :return: The vertices of each alpha shape, in the same order as point_sets
+    """
+    compute = functools.partial(get_alpha_shape, engine=engine, alpha=alpha, rings=rings)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(compute, point_sets))
+
+
+def get_alpha_shape_edges(points: "list[(float, float)]", engine: str = "numpy", alpha: float = None) -> "list[(int, int)]":
+    """
+    Returns the edges of the alpha shape as pairs of indices into points.
+    :param points: A list of 2d points
+    :param engine: The name of the engine to use (one of ENGINES)
+    :param alpha: The alpha (radius) to use, only supported by the numpy engine
+    :return: A list of (i, j) index pairs, one per boundary edge
+    """
+    try:
+        engine_func = ENGINES[engine]
+    except KeyError:
+        raise ValueError("Unknown engine {0!r}, expected one of {1}".format(engine, sorted(ENGINES)))
+    return engine_func(points, alpha)
+
+
+def _subprocess_alpha_shape_edges(points: "list[(float, float)]", alpha: float = None) -> "list[(int, int)]":
+    """
+    Runs the external hull program on points.
     :param points: A list of 2d points
-    :return: The vertices of the alpha shape.
+    :param alpha: Not supported, the external program always chooses the best alpha
+    :return: A list of (i, j) index pairs, one per boundary edge
     """
+    if alpha is not None:
+        raise ValueError("The subprocess engine does not support choosing alpha")
     bio = io.BytesIO()
     for point in points:
         bio.write("{0} {1}\n".format(*point).encode())
 
-    p = Popen([hull_path, '-A', '-oN', '-m1000000'], stdout=PIPE, stdin=PIPE, stderr=STDOUT)
-    stdoutput, stderr = p.communicate(input=bio.getvalue())
-    if stderr is not None:
-        raise RuntimeError("Got errors when running hull: {0}".format(stderr))
-    with open(output_file) as output:
-        next(output)
-        results_indices = [map(int, line.strip().split()) for line in output]
-    os.remove(output_file)
-    edges = [(points[i], points[j]) for i, j in results_indices]
-    return edges_to_vertices(order_edges(edges))
+    with tempfile.TemporaryDirectory(prefix='hull-') as work_dir:
+        # the hull program always writes output_file into its working directory,
+        # so every call gets a private one and concurrent calls can't clobber each other
+        p = Popen([hull_path, '-A', '-oN', '-m1000000'], stdout=PIPE, stdin=PIPE, stderr=STDOUT, cwd=work_dir)
+        stdoutput, stderr = p.communicate(input=bio.getvalue())
+        if stderr is not None:
+            raise RuntimeError("Got errors when running hull: {0}".format(stderr))
+        with open(os.path.join(work_dir, output_file)) as output:
+            next(output)
+            results_indices = [tuple(map(int, line.strip().split())) for line in output]
+    return results_indices
+
+
+def circumradii(points: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """
+    Returns the circumradius of every triangle (inf for degenerate triangles)
+    :param points: An (N, 2) array of points
+    :param triangles: An (T, 3) array of indices into points
+    :return: An array of T radii
+    """
+    a, b, c = (points[triangles[:, i]] for i in range(3))
+    la = np.hypot(*(b - c).T)
+    lb = np.hypot(*(c - a).T)
+    lc = np.hypot(*(a - b).T)
+    double_area = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        radii = la * lb * lc / (2 * double_area)
+    radii[double_area == 0] = np.inf
+    return radii
+
+
+def delaunay_triangles(points: np.ndarray) -> np.ndarray:
+    """
+    Triangulates points, with every triangle oriented counter-clockwise
+    :param points: An (N, 2) array of points
+    :return: A (T, 3) array of indices into points
+    """
+    return orient_triangles(points, Delaunay(points).simplices)
+
+
+def delaunay(points: np.ndarray) -> "(np.ndarray, np.ndarray)":
+    """
+    Triangulates points, with every triangle oriented counter-clockwise
+    :param points: An (N, 2) array of points
+    :return: A (T, 3) array of indices into points, and a (T, 3) array of the triangle across the edge
+             opposite every corner (-1 for edges of the convex hull)
+    """
+    triangulation = Delaunay(points)
+    triangles = np.array(triangulation.simplices, dtype=np.int64)
+    neighbors = np.array(triangulation.neighbors, dtype=np.int64)
+    clockwise = orient_triangles(points, triangles)[:, 1] != triangles[:, 1]
+    # neighbors[t, k] is the triangle across the edge opposite triangles[t, k], so they are swapped together
+    triangles[clockwise, 1], triangles[clockwise, 2] = triangles[clockwise, 2], triangles[clockwise, 1].copy()
+    neighbors[clockwise, 1], neighbors[clockwise, 2] = neighbors[clockwise, 2], neighbors[clockwise, 1].copy()
+    return triangles, neighbors
+
+
+def orient_triangles(points: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """
+    Returns a copy of triangles, with every triangle oriented counter-clockwise
+    :param points: An (N, 2) array of points
+    :param triangles: A (T, 3) array of indices into points
+    :return: A (T, 3) array of indices into points
+    """
+    triangles = np.array(triangles)
+    a, b, c = (points[triangles[:, i]] for i in range(3))
+    clockwise = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]) < 0
+    triangles[clockwise, 1], triangles[clockwise, 2] = triangles[clockwise, 2], triangles[clockwise, 1].copy()
+    return triangles
+
+
+def edge_alphas(points: np.ndarray, triangles: np.ndarray, neighbors: np.ndarray, radii: np.ndarray,
+                which: np.ndarray = None) -> np.ndarray:
+    """
+    Returns the alpha at which every edge enters the alpha complex, like the hull program computes it:
+    half its length, unless the angle opposite it in one of its triangles is obtuse,
+    in which case the edge enters with that triangle.
+    :param points: An (N, 2) array of points
+    :param triangles: A (T, 3) array of indices into points
+    :param neighbors: The (T, 3) triangles across the edge opposite every corner (-1 for the convex hull)
+    :param radii: The circumradius of each triangle
+    :param which: The indices of the triangles to compute the edges of (defaults to all of them)
+    :return: A (len(which), 3) array, with the alpha of the edge opposite every corner
+    """
+    which = np.arange(len(triangles)) if which is None else np.asarray(which, dtype=np.int64)
+    corners = triangles[which]
+    alphas = np.empty(corners.shape)
+    for k in range(3):
+        p, a, b = (points[corners[:, (k + i) % 3]] for i in range(3))
+        neighbor = neighbors[which, k]
+        across = neighbor != -1
+        # the corner of the neighbor that isn't on the edge
+        q = points[np.where(across, triangles[neighbor].sum(axis=1) - corners[:, (k + 1) % 3] - corners[:, (k + 2) % 3],
+                            corners[:, k])]
+        obtuse = ((a - p) * (b - p)).sum(axis=1) < 0
+        neighbor_obtuse = across & (((a - q) * (b - q)).sum(axis=1) < 0)
+        alphas[:, k] = np.where(obtuse, radii[which],
+                                np.where(neighbor_obtuse, radii[neighbor], np.hypot(*(a - b).T) / 2))
+    return alphas
+
+
+def enclosure_alphas(neighbors: np.ndarray, edge_alphas: np.ndarray) -> np.ndarray:
+    """
+    Returns the alpha at which every triangle becomes part of the alpha shape: the alpha at which the edges of
+    the alpha complex cut it off from outside the convex hull (at the latest, its own circumradius).
+    That is the largest, over the paths from outside to the triangle, of the smallest alpha of an edge on the path,
+    found along a maximum spanning tree.
+    :param neighbors: The (T, 3) triangles across the edge opposite every corner (-1 for the convex hull)
+    :param edge_alphas: The (T, 3) alphas of the edge opposite every corner
+    :return: An array of T alphas
+    """
+    num_triangles = len(neighbors)
+    if not num_triangles:
+        return np.empty(0)
+    triangles = np.repeat(np.arange(num_triangles), 3)
+    across = neighbors.ravel()
+    alphas = edge_alphas.ravel()
+    # every edge once, with outside the convex hull as node num_triangles
+    keep = across < triangles
+    triangles, across, alphas = triangles[keep], np.where(across[keep] == -1, num_triangles, across[keep]), alphas[keep]
+    # a maximum spanning tree is a minimum one over the (positive) ranks of the edges from the largest
+    order = np.argsort(-alphas, kind='stable')
+    ranks = np.empty(len(order), dtype=np.float64)
+    ranks[order] = np.arange(1, len(order) + 1)
+    graph = coo_matrix((ranks, (triangles, across)), shape=(num_triangles + 1,) * 2).tocsr()
+    tree = minimum_spanning_tree(graph)
+    tree = (tree + tree.T).tocsr()
+    _, parents = breadth_first_order(tree, num_triangles, directed=False, return_predecessors=True)
+    nodes = np.arange(num_triangles)
+    enclosure = alphas[order][np.asarray(tree[parents[:-1], nodes]).ravel().astype(np.int64) - 1]
+    # the smallest alpha on the path to the root, by pointer jumping
+    enclosure = np.append(enclosure, np.inf)
+    ancestors = np.append(parents[:-1], num_triangles)
+    while (ancestors != num_triangles).any():
+        enclosure = np.minimum(enclosure, enclosure[ancestors])
+        ancestors = ancestors[ancestors]
+    return enclosure[:-1]
+
+
+def triangle_alphas(points: np.ndarray, triangles: np.ndarray, neighbors: np.ndarray) -> np.ndarray:
+    """
+    Returns the alpha at which every triangle becomes part of the alpha shape (see enclosure_alphas)
+    :param points: An (N, 2) array of points
+    :param triangles: A (T, 3) array of counter-clockwise triangles
+    :param neighbors: The (T, 3) triangles across the edge opposite every corner (-1 for the convex hull)
+    :return: An array of T alphas
+    """
+    return enclosure_alphas(neighbors, edge_alphas(points, triangles, neighbors, circumradii(points, triangles)))
+
+
+def best_alpha(points: np.ndarray, triangles: np.ndarray, alphas: np.ndarray) -> float:
+    """
+    Chooses alpha the same way the external hull program does:
+    a coarse bisection (over squared radii) for an alpha at which every point is a vertex of the shape,
+    padded by 10%.
+    :param points: An (N, 2) array of points
+    :param triangles: A (T, 3) array of indices into points
+    :param alphas: The alpha at which each triangle becomes part of the shape (see triangle_alphas)
+    :return: The alpha
+    """
+    smallest = np.full(len(points), np.inf)
+    np.minimum.at(smallest, triangles.ravel(), np.repeat(alphas, 3))
+    smallest = smallest[np.isfinite(smallest)]
+    if not len(smallest):
+        return np.inf
+    return bisect_alpha(smallest.max(), float(((points.max(axis=0) - points.min(axis=0)) ** 2).sum()))
+
+
+def bisect_alpha(needed: float, diagonal_squared: float) -> float:
+    """
+    The bisection of best_alpha
+    :param needed: The smallest radius at which every point is a vertex of the shape
+    :param diagonal_squared: The squared diagonal of the bounding box of the points
+    :return: The alpha
+    """
+    needed = needed ** 2
+    low, high = 0.0, diagonal_squared
+    for _ in range(17):
+        middle = (low + high) / 2
+        if middle >= needed:
+            high = middle
+        else:
+            low = middle
+        if (high - low) / high < .5:
+            break
+    return float(np.sqrt(1.1 * high))
+
+
+def boundary_edges(triangles: np.ndarray, num_points: int) -> np.ndarray:
+    """
+    Returns the edges that belong to exactly one of the given triangles.
+    The edges keep the orientation of their triangle, so outer boundaries run counter-clockwise
+    and holes run clockwise.
+    :param triangles: A (T, 3) array of counter-clockwise triangles
+    :param num_points: The number of points triangles index into
+    :return: An (E, 2) array of indices
+    """
+    directed = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    keys = directed.min(axis=1).astype(np.int64) * num_points + directed.max(axis=1)
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    return directed[np.sort(first[counts == 1])]
+
+
+def _numpy_alpha_shape_edges(points: "list[(float, float)]", alpha: float = None) -> "list[(int, int)]":
+    """
+    Computes the alpha shape in process from the Delaunay triangulation of points.
+    :param points: A list of 2d points
+    :param alpha: The alpha (radius) to use, or None to choose the best one
+    :return: A list of (i, j) index pairs, one per boundary edge
+    """
+    points = np.asarray(points, dtype=np.float64)
+    triangles, neighbors = delaunay(points)
+    alphas = triangle_alphas(points, triangles, neighbors)
+    if alpha is None:
+        alpha = best_alpha(points, triangles, alphas)
+    edges = boundary_edges(triangles[alphas <= alpha], len(points))
+    # like in the hull program's output, every ring starts with the edge leaving its lowest point
+    edges = edges[np.argsort(edges[:, 0], kind='stable')]
+    return [tuple(edge) for edge in edges.tolist()]
 
 
-def plot_hull(ax: plt.Axes, points: "list[(float, float)]", vertices: "list[(float, float)]") -> None:
+ENGINES = {
+    "numpy": _numpy_alpha_shape_edges,
+    "subprocess": _subprocess_alpha_shape_edges,
+}
+
+
+def plot_hull(ax: plt.Axes, points: "list[(float, float)]", vertices: "list[(float, float)]",
+              decimate: bool = False) -> None:
     """
     Plots the points and the hull.
     :param ax: matplotlib axes, where the hull will be be plotted
     :param points: A list of 2d points
-    :param vertices: A list of vertices of the hull to plot
+    :param vertices: A list of vertices of the hull to plot, or a list of rings of vertices
+    :param decimate: Whether to draw the points as a rasterized DecimatedPoints collection
+                     (for very large point clouds)
     """
-    for data, color in [(points, 'b'), (vertices, 'r')]:
+    rings = vertices if is_multi_ring(vertices) else [vertices]
+    series = [(points, 'b'), (list(itertools.chain(*rings)), 'r')]
+    if decimate:
+        ax.add_collection(DecimatedPoints(ax, points, color='b'), autolim=False)
+        series = series[1:]
+    for data, color in series:
         ax.plot(*zip(*data), color=color, marker='o', linestyle='')
-    poly = plt.Polygon(vertices, linewidth=2, facecolor='r', edgecolor='r', linestyle='solid', alpha=0.5)
+    closed_rings = [np.asarray(ring, dtype=np.float64).reshape(-1, 2) for ring in rings]
+    path = Path.make_compound_path(*[Path(np.concatenate([ring, ring[:1]]), closed=True) for ring in closed_rings])
+    poly = PathPatch(path, linewidth=2, facecolor='r', edgecolor='r', linestyle='solid', alpha=0.5)
     ax.add_patch(poly)
 
 
+class DecimatedPoints(PathCollection):
+    """
+    Draws a large number of points as a rasterized collection, keeping about one point per pixel.
+    The points are decimated over a window around the view (margin view sizes to each side),
+    and only decimated again when zooming or panning out of the window.
+    """
+
+    def __init__(self, ax: plt.Axes, points: "list[(float, float)]", color: str = 'b', size: float = 4,
+                 margin: float = 1.0, **kwargs):
+        """
+        :param ax: matplotlib axes, where the points will be be plotted
+        :param points: A list (or an (N, 2) array) of 2d points
+        :param color: The color of the points
+        :param size: The size of the markers (in points ** 2)
+        :param margin: How far (in view sizes) around the view to decimate points
+        """
+        marker = MarkerStyle('o')
+        super().__init__([marker.get_path().transformed(marker.get_transform())], sizes=[size],
+                         offsets=np.empty((0, 2)), offset_transform=ax.transData, transform=IdentityTransform(),
+                         facecolors=color, edgecolors='face', linewidths=0, rasterized=True, **kwargs)
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.margin = margin
+        self.decimations = 0
+        self._view_size = None
+        self._window = None
+        if len(self.points):
+            ax.update_datalim([self.points.min(axis=0), self.points.max(axis=0)])
+            ax.autoscale_view()
+
+    @allow_rasterization
+    def draw(self, renderer) -> None:
+        self._decimate()
+        super().draw(renderer)
+
+    def _decimate(self) -> None:
+        ax = self.axes
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        bbox = ax.get_window_extent()
+        view_size = (x1 - x0, y1 - y0, bbox.width, bbox.height)
+        if self._view_size is not None and np.allclose(view_size, self._view_size) \
+                and self._window[0] <= x0 and x1 <= self._window[1] and self._window[2] <= y0 and y1 <= self._window[3]:
+            return
+        width, height = x1 - x0, y1 - y0
+        window = (x0 - self.margin * width, x1 + self.margin * width,
+                  y0 - self.margin * height, y1 + self.margin * height)
+        x, y = self.points[:, 0], self.points[:, 1]
+        visible = self.points[(x >= window[0]) & (x <= window[1]) & (y >= window[2]) & (y <= window[3])]
+        # one point per screen pixel (the first one in it)
+        pixel_width, pixel_height = width / max(bbox.width, 1), height / max(bbox.height, 1)
+        num_rows = int(np.ceil((window[3] - window[2]) / pixel_height)) + 1
+        columns = ((visible[:, 0] - window[0]) / pixel_width).astype(np.int64)
+        rows = ((visible[:, 1] - window[2]) / pixel_height).astype(np.int64)
+        _, first = np.unique(columns * num_rows + rows, return_index=True)
+        self.set_offsets(visible[first])
+        self._view_size, self._window = view_size, window
+        self.decimations += 1
+
+
 def pairs(items: "list[T]") -> "list[(T, T)]":
     """
     Returns pairs of items in items.
@@ -74,36 +426,85 @@ def get_vertices_set(edges: "list[((float, float), (float, float))") -> "list[(f
 def order_edges(edges: "list[((float, float), (float, float))") -> "list[(float, float)]":
     """
     Orders edges so that one edge always leads to the next
-    :param edges: A list of edges
+    :param edges: A list of edges, that form a single ring
     :return: A list of sorted edges
     """
-    edge_set = set(edges)
-    current_edge = edge_set.pop()
-    edges = [current_edge]
-    while len(edge_set):
-        for other_edge in edge_set:
-            if current_edge[1] == other_edge[0]:
-                current_edge = other_edge
-                edge_to_remove = other_edge
-                edges.append(current_edge)
-                break
-            elif current_edge[1] == other_edge[1]:
-                current_edge = (other_edge[1], other_edge[0])
-                edge_to_remove = other_edge
-                edges.append(current_edge)
-                break
-        else:
-            raise AssertionError("No edge starting from {0}".format(current_edge[1]))
-        edge_set.remove(edge_to_remove)
-    return edges
+    rings = order_edge_rings(edges)
+    if len(rings) != 1:
+        raise AssertionError("Edges form {0} rings, use order_edge_rings to get all of them".format(len(rings)))
+    return rings[0]
+
+
+def _pop_unused(edge_indices: "list[int]", used: "list[bool]") -> int:
+    """
+    Pops the last index of an unused edge (dropping used ones along the way)
+    :param edge_indices: indices of edges
+    :param used: whether each edge was used already
+    :return: The index, or None if all edges were used
+    """
+    while edge_indices:
+        index = edge_indices.pop()
+        if not used[index]:
+            return index
+    return None
+
+
+def order_edge_rings(edges: "list[((float, float), (float, float))") -> "list[list[((float, float), (float, float))]]":
+    """
+    Orders edges into closed rings, so that within a ring one edge always leads to the next.
+    Runs in linear time, using an index of the edges touching every vertex.
+    Edges are followed in their given direction when possible, so consistently oriented edges
+    give consistently oriented rings (e.g. an outer boundary and its holes).
+    :param edges: A list of edges
+    :return: A list of rings, each a list of sorted edges
+    """
+    edges = list(dict.fromkeys(edges))
+    outgoing = collections.defaultdict(list)
+    incoming = collections.defaultdict(list)
+    for index, (v1, v2) in enumerate(reversed(edges)):
+        outgoing[v1].append(len(edges) - 1 - index)
+        incoming[v2].append(len(edges) - 1 - index)
+    used = [False] * len(edges)
+    rings = []
+    for start_index, start_edge in enumerate(edges):
+        if used[start_index]:
+            continue
+        used[start_index] = True
+        ring = [start_edge]
+        start, current = start_edge
+        while current != start:
+            index = _pop_unused(outgoing[current], used)
+            if index is not None:
+                edge = edges[index]
+            else:
+                index = _pop_unused(incoming[current], used)
+                if index is None:
+                    raise AssertionError("No edge starting from {0}".format(current))
+                edge = (edges[index][1], edges[index][0])
+            used[index] = True
+            ring.append(edge)
+            current = edge[1]
+        rings.append(ring)
+    return rings
+
+
+def is_multi_ring(items: list, item_ndim: int = 1) -> bool:
+    """
+    Returns whether items is a list of rings (rather than a single ring), by how deeply its first item nests
+    :param items: a list (or array) of vertices or edges, or a list of lists of them
+    :param item_ndim: The dimensions of a single item: 1 for a vertex, 2 for an edge
+    """
+    return len(items) > 0 and np.ndim(items[0]) > item_ndim
 
 
 def edges_to_vertices(edges: "list[((float, float), (float, float))") -> "list[(float, float)]":
     """
     Converts *sorted* edges to vertices
-    :param edges: a list of edges
-    :return: a list of vertices
+    :param edges: a list of edges, or a list of rings of edges (as returned by order_edge_rings)
+    :return: a list of vertices, or a list of rings of vertices
     """
+    if is_multi_ring(edges, item_ndim=2):
+        return [edges_to_vertices(ring) for ring in edges]
     vertices = []
     for v1, v2 in edges:
         vertices.append(v1)
@@ -113,16 +514,83 @@ def edges_to_vertices(edges: "list[((float, float), (float, float))") -> "list[(
 def polygon_area(vertices: "list[(float, float)]") -> float:
     """
     Returns the area of a simple polygon enclosed by the given vertices
-    :param vertices: a list of vertices
+    :param vertices: a list (or an (N, 2) array) of vertices, a list of *sorted* (v1, v2) edges,
+                     or a list of rings of vertices, where holes run in the opposite direction of their outer boundary
     :return: The area of the polygon.
     """
-    n = len(vertices)
-    a = 0.0
-    for i in range(n):
-        j = (i + 1) % n
-        a += abs(vertices[i][0] * vertices[j][1]-vertices[j][0] * vertices[i][1])
-    result = a / 2.0
-    return result
+    if is_multi_ring(vertices):
+        if isinstance(vertices[0], tuple):
+            return abs(signed_polygon_area(edges_to_vertices(vertices)))
+        return abs(sum(signed_polygon_area(ring) for ring in vertices))
+    return abs(signed_polygon_area(vertices))
+
+
+def signed_polygon_area(vertices: "list[(float, float)]") -> float:
+    """
+    Returns the area of a simple polygon, positive if its vertices run counter-clockwise
+    :param vertices: a list (or an (N, 2) array) of vertices
+    :return: The signed area of the polygon.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    x, y = vertices[:, 0], vertices[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2.0
+
+
+PolygonMetrics = collections.namedtuple('PolygonMetrics', ['area', 'perimeter', 'centroid'])
+
+
+def pack_polygons(polygons: "list[list[(float, float)]]") -> "(np.ndarray, np.ndarray)":
+    """
+    Packs polygons into the flat layout used by polygon_metrics
+    >>> vertices, offsets = pack_polygons([[(0, 0), (1, 0), (0, 1)], [(5, 5), (6, 5)]])
+    >>> vertices.shape, offsets.tolist()
+    ((5, 2), [0, 3, 5])
+
+    :param polygons: a list of polygons, each a list of vertices
+    :return: an (M, 2) array with the vertices of all polygons, and the K+1 offsets where each polygon starts
+    """
+    offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+    np.cumsum([len(polygon) for polygon in polygons], out=offsets[1:])
+    if not offsets[-1]:
+        return np.empty((0, 2)), offsets
+    vertices = np.concatenate([np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in polygons])
+    return vertices, offsets
+
+
+def polygon_metrics(vertices: np.ndarray, offsets: np.ndarray) -> PolygonMetrics:
+    """
+    Computes the area, perimeter and centroid of many polygons at once.
+    Polygon k is made of vertices[offsets[k]:offsets[k+1]] (see pack_polygons).
+    :param vertices: an (M, 2) array with the vertices of all polygons
+    :param offsets: the K+1 offsets where each polygon starts
+    :return: PolygonMetrics of K areas, K perimeters and a (K, 2) array of centroids
+             (nan for polygons without area)
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    starts, ends = offsets[:-1], offsets[1:]
+    non_empty = ends > starts
+    area = np.zeros(len(starts))
+    perimeter = np.zeros(len(starts))
+    centroid = np.full((len(starts), 2), np.nan)
+    if not non_empty.any():
+        return PolygonMetrics(area, perimeter, centroid)
+    following = np.arange(1, len(vertices) + 1)
+    following[ends[non_empty] - 1] = starts[non_empty]
+    x, y = vertices[:, 0], vertices[:, 1]
+    next_x, next_y = x[following], y[following]
+    cross = x * next_y - next_x * y
+
+    def per_polygon(values):
+        return np.add.reduceat(values, starts[non_empty])
+
+    signed_area = per_polygon(cross) / 2.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centroid[non_empty, 0] = per_polygon((x + next_x) * cross) / (6.0 * signed_area)
+        centroid[non_empty, 1] = per_polygon((y + next_y) * cross) / (6.0 * signed_area)
+    area[non_empty] = np.abs(signed_area)
+    perimeter[non_empty] = per_polygon(np.hypot(next_x - x, next_y - y))
+    return PolygonMetrics(area, perimeter, centroid)
 
 
 def read_points(stream: "collections.Iterable[str]") -> "list[(float, float)]":
@@ -137,12 +605,52 @@ def read_points(stream: "collections.Iterable[str]") -> "list[(float, float)]":
     return points
 
 
+def iter_point_chunks(stream: "collections.Iterable[str]", chunk_size: int = 2 ** 20) -> "collections.Iterator[np.ndarray]":
+    """
+    Reads 2d points from a string stream, chunk_size lines at a time,
+    so only one chunk of text is held in memory at once
+    >>> [chunk.tolist() for chunk in iter_point_chunks(["1 1.5", "10 3", "4 2"], chunk_size=2)]
+    [[[1.0, 1.5], [10.0, 3.0]], [[4.0, 2.0]]]
+
+    :param stream: an iterable of strings of the format ["x y"]
+    :param chunk_size: the (maximal) number of points in every chunk
+    :return: an iterator of (chunk_size, 2) float64 arrays
+    """
+    stream = iter(stream)
+    while True:
+        lines = list(itertools.islice(stream, chunk_size))
+        if not lines:
+            return
+        # the text is parsed in C, in one call per chunk, which checks every line has the same number of columns
+        values = np.loadtxt(lines, dtype=np.float64, comments=None, ndmin=2)
+        if values.shape[1] != 2:
+            raise ValueError("Expected lines of the format 'x y', got {0} numbers per line".format(values.shape[1]))
+        yield values
+
+
+def read_points_array(stream: "collections.Iterable[str]", chunk_size: int = 2 ** 20) -> np.ndarray:
+    """
+    Reads 2d points from a string stream into an array
+    >>> read_points_array(["1 1.5", "10 3"])
+    array([[ 1. ,  1.5],
+           [10. ,  3. ]])
+
+    :param stream: an iterable of strings of the format ["x y"]
+    :param chunk_size: the number of lines to parse at a time
+    :return: an (N, 2) float64 array
+    """
+    chunks = list(iter_point_chunks(stream, chunk_size))
+    if not chunks:
+        return np.empty((0, 2))
+    return np.concatenate(chunks)
+
+
 def main(stream: "collections.Iterable[str]") -> None:
     """
     Given a stream of points calculates the hull and plots it
     :param stream: a list of strings of the format ["x y"]
     """
-    points = read_points(stream)
+    points = read_points_array(stream)
     fig, ax = plt.subplots()
     plot_hull(ax, points, get_alpha_shape(points))
     plt.show()
@@ -0,0 +1,441 @@
+import time
+import random
+
+import numpy as np
+from scipy.spatial import QhullError
+
+from concave_hull import hull
+
+
+def _grow(array: np.ndarray, size: int, fill=0) -> np.ndarray:
+    """
+    Returns array with at least size rows (doubling its capacity when it's too small)
+    """
+    if len(array) >= size:
+        return array
+    grown = np.full((max(size, 2 * len(array)),) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _orient(p: "(float, float)", q: "(float, float)", r: "(float, float)") -> float:
+    """
+    Positive if p, q, r turn counter-clockwise, negative if clockwise, 0 if they are collinear
+    """
+    return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+
+def _in_circle(a: "(float, float)", b: "(float, float)", c: "(float, float)", p: "(float, float)") -> bool:
+    """
+    Whether p is strictly inside the circumcircle of the counter-clockwise triangle a, b, c
+    """
+    ax, ay = a[0] - p[0], a[1] - p[1]
+    bx, by = b[0] - p[0], b[1] - p[1]
+    cx, cy = c[0] - p[0], c[1] - p[1]
+    return ((ax * ax + ay * ay) * (bx * cy - cx * by) - (bx * bx + by * by) * (ax * cy - cx * ay)
+            + (cx * cx + cy * cy) * (ax * by - bx * ay)) > 0
+
+
+class IncrementalHull:
+    """
+    A concave hull that is updated as points are appended.
+    The first points are triangulated at once, and every later point is inserted into the
+    Delaunay triangulation in place (Bowyer-Watson), replacing only the triangles whose circumcircle it falls in.
+    With a fixed alpha, only the regions around the replaced triangles are searched again for what the alpha complex
+    encloses, and their boundary edges patched, so an update costs about the same however many points there already are.
+    When alpha is chosen automatically, the alpha of every triangle is recomputed (with numpy) after every update,
+    since a new point can change what is enclosed anywhere.
+    The time each update took is kept in latencies.
+
+    >>> incremental = IncrementalHull(alpha=10)
+    >>> incremental.add_points([(0, 0), (2, 0)])
+    []
+    >>> incremental.add_points([(0, 2)])
+    [[(2.0, 0.0), (0.0, 2.0), (0.0, 0.0)]]
+    >>> incremental.add_points([(0.5, 0.6)])
+    [[(0.0, 2.0), (0.0, 0.0), (2.0, 0.0)]]
+    >>> len(incremental.add_points([(2, 2)])[0])
+    4
+    """
+
+    # batches larger than this fraction of the points are triangulated from scratch, which is faster
+    rebuild_ratio = 0.25
+
+    def __init__(self, points: "list[(float, float)]" = (), alpha: float = None):
+        """
+        :param points: The initial points
+        :param alpha: The alpha (radius) to use, or None to choose the best one after every update
+        """
+        self.alpha = alpha
+        self.latencies = []
+        self._points = np.empty((0, 2))
+        self._vertices = []
+        self._triangulated = False
+        self._shape = []
+        # the walks are randomized with generators of their own, leaving the global ones alone
+        self._random = random.Random()
+        self._numpy_random = np.random.default_rng()
+        if len(points):
+            self.add_points(points)
+
+    @property
+    def points(self) -> np.ndarray:
+        """
+        All the points added so far, as an (N, 2) array
+        """
+        return self._points[:len(self._vertices)]
+
+    @property
+    def triangles(self) -> np.ndarray:
+        """
+        The current Delaunay triangles, as a (T, 3) array of counter-clockwise indices into points
+        """
+        if not self._triangulated:
+            return np.empty((0, 3), dtype=np.int64)
+        return self._triangles[:self._num_triangles][self._alive[:self._num_triangles]]
+
+    @property
+    def shape(self) -> "list[list[(float, float)]]":
+        """
+        The current alpha shape, as a list of rings of vertices
+        """
+        return self._shape
+
+    def add_points(self, points: "list[(float, float)]") -> "list[list[(float, float)]]":
+        """
+        Adds points and updates the hull
+        :param points: A list (or an (N, 2) array) of 2d points
+        :return: The updated alpha shape, as a list of rings of vertices
+        """
+        start = time.perf_counter()
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        first = len(self._vertices)
+        self._points = _grow(self._points, first + len(points))
+        self._points[first:first + len(points)] = points
+        self._vertices.extend(tuple(point) for point in points.tolist())
+        if len(points):
+            if not self._triangulated or len(points) > self.rebuild_ratio * first:
+                self._triangulate()
+            else:
+                self._insert(range(first, len(self._vertices)))
+        self.latencies.append((len(self._vertices), time.perf_counter() - start))
+        return self._shape
+
+    def close(self) -> None:
+        """
+        Releases the triangulation (the shape and points are kept)
+        """
+        if self._triangulated:
+            del self._triangles, self._neighbors, self._alive, self._radii, self._edge_alphas, self._outside
+            del self._vertex_triangle
+            self._triangulated = False
+
+    def _triangulate(self) -> None:
+        """
+        Triangulates all the points from scratch
+        """
+        points = self.points
+        try:
+            triangles, neighbors = hull.delaunay(points)
+        except QhullError:
+            # too few (or degenerate) points to start triangulating, wait for more
+            return
+        self._triangles, self._neighbors = triangles, neighbors
+        self._num_triangles = len(triangles)
+        self._alive = np.ones(len(triangles), dtype=bool)
+        self._free = []
+        self._radii = hull.circumradii(points, triangles)
+        self._edge_alphas = hull.edge_alphas(points, triangles, neighbors, self._radii)
+        self._outside = np.zeros(len(triangles), dtype=bool)
+        # a triangle touching every vertex (-1 for points left out of the triangulation, e.g. duplicates)
+        self._vertex_triangle = np.full(len(points), -1, dtype=np.int64)
+        self._vertex_triangle[triangles.ravel()] = np.repeat(np.arange(len(triangles)), 3)
+        self._last_triangle = 0
+        self._triangulated = True
+        self._rebuild_boundary()
+
+    def _rebuild_boundary(self) -> None:
+        """
+        Computes the shape (and alpha, when it's chosen automatically) from all the triangles
+        """
+        alive = np.flatnonzero(self._alive[:self._num_triangles])
+        # the neighbors as indices into alive (the last entry maps -1 to itself)
+        compact = np.full(self._num_triangles + 1, -1, dtype=np.int64)
+        compact[alive] = np.arange(len(alive))
+        alphas = hull.enclosure_alphas(compact[self._neighbors[alive]], self._edge_alphas[alive])
+        alpha = self.alpha
+        if alpha is None:
+            alpha = hull.best_alpha(self.points, self._triangles[alive], alphas)
+        self._outside[alive] = alphas > alpha
+        edges = hull.boundary_edges(self._triangles[alive[alphas <= alpha]], len(self._vertices))
+        self._boundary = {(min(i, j), max(i, j)): (i, j) for i, j in edges.tolist()}
+        self._shape_alpha = alpha
+        self._update_shape()
+
+    def _update_shape(self) -> None:
+        vertices = self._vertices
+        edges = [(vertices[i], vertices[j]) for i, j in self._boundary.values()]
+        self._shape = hull.edges_to_vertices(hull.order_edge_rings(edges))
+
+    def _insert(self, new_vertices: "collections.Iterable[int]") -> None:
+        """
+        Inserts points into the triangulation, and patches the shape
+        """
+        self._vertex_triangle = _grow(self._vertex_triangle, len(self._vertices), fill=-1)
+        removed, added = {}, set()
+        for vertex in new_vertices:
+            for triangle, corners in self._insert_vertex(vertex).items():
+                if triangle in added:
+                    # created by an earlier point of this batch, and already gone
+                    added.discard(triangle)
+                else:
+                    removed[triangle] = corners
+            added.update(self._added)
+        added = sorted(added)
+        self._radii = _grow(self._radii, self._num_triangles)
+        self._radii[added] = hull.circumradii(self.points, self._triangles[added])
+        self._edge_alphas = _grow(self._edge_alphas, self._num_triangles)
+        self._outside = _grow(self._outside, self._num_triangles)
+        self._update_edge_alphas(added)
+
+        if self.alpha is None:
+            self._rebuild_boundary()
+            return
+        self._patch_boundary(removed, added)
+        self._update_shape()
+
+    def _update_edge_alphas(self, added: "list[int]") -> None:
+        """
+        Computes the alphas of the edges of the new triangles, on both of their sides
+        """
+        alphas = hull.edge_alphas(self.points, self._triangles, self._neighbors, self._radii, added)
+        self._edge_alphas[added] = alphas
+        for triangle, neighbors, edge_alphas in zip(added, self._neighbors[added].tolist(), alphas.tolist()):
+            for neighbor, edge_alpha in zip(neighbors, edge_alphas):
+                if neighbor != -1:
+                    self._edge_alphas[neighbor, self._neighbors[neighbor].tolist().index(triangle)] = edge_alpha
+
+    def _patch_boundary(self, removed: "dict[int, list[int]]", added: "list[int]") -> None:
+        """
+        Updates the boundary of the shape, whose edges can only have changed around the given triangles
+        """
+        for corners in removed.values():
+            for k in range(3):
+                i, j = corners[k], corners[(k + 1) % 3]
+                self._boundary.pop((min(i, j), max(i, j)), None)
+        for triangle in sorted(self._update_outside(added)):
+            corners = self._triangles[triangle].tolist()
+            neighbors = self._neighbors[triangle].tolist()
+            inside = not self._outside[triangle]
+            for k in range(3):
+                # the edge opposite corner k, and the triangle across it
+                i, j = corners[(k + 1) % 3], corners[(k + 2) % 3]
+                neighbor = neighbors[k]
+                neighbor_inside = neighbor != -1 and not self._outside[neighbor]
+                key = (min(i, j), max(i, j))
+                if inside and not neighbor_inside:
+                    self._boundary[key] = (i, j)
+                elif neighbor_inside and not inside:
+                    self._boundary[key] = (j, i)
+                else:
+                    self._boundary.pop(key, None)
+
+    def _update_outside(self, added: "list[int]") -> "set[int]":
+        """
+        Finds again which triangles are outside the shape (reachable from outside the convex hull without crossing
+        an edge of the alpha complex) in the regions touching the new triangles, the only ones that can have changed
+        :return: The new triangles and the ones that changed sides
+        """
+        alpha = self._shape_alpha
+        seeds = set(added)
+        for triangle in added:
+            seeds.update(neighbor for neighbor in self._neighbors[triangle].tolist() if neighbor != -1)
+        changed, resolved = set(added), set()
+        for seed in sorted(seeds):
+            if seed in resolved:
+                continue
+            # breadth first, so that a region outside the shape soon reaches the convex hull
+            region, seen, outside = [seed], {seed}, False
+            for triangle in region:
+                crossable = self._crossable(triangle, alpha)
+                if -1 in crossable:
+                    outside = True
+                    break
+                for neighbor in crossable:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        region.append(neighbor)
+            if outside:
+                # the rest of the region was outside already, except for enclosed parts this update opened
+                for triangle in region:
+                    for neighbor in self._crossable(triangle, alpha):
+                        if neighbor != -1 and neighbor not in seen and not self._outside[neighbor]:
+                            seen.add(neighbor)
+                            region.append(neighbor)
+            for triangle in region:
+                if self._outside[triangle] != outside:
+                    self._outside[triangle] = outside
+                    changed.add(triangle)
+            resolved.update(region)
+        return changed
+
+    def _crossable(self, triangle: int, alpha: float) -> "list[int]":
+        """
+        Returns the triangles across the edges of triangle that aren't in the alpha complex (-1 for outside the hull)
+        """
+        return [neighbor for neighbor, edge_alpha in zip(self._neighbors[triangle].tolist(),
+                                                          self._edge_alphas[triangle].tolist()) if edge_alpha > alpha]
+
+    def _locate(self, point: "(float, float)") -> "(int, int)":
+        """
+        Walks the triangulation towards point
+        :return: The triangle containing point and -1, or (if point is outside the triangulation)
+                 a triangle and the index of its corner opposite a hull edge that point is outside of
+        """
+        vertices = self._vertices
+        triangle = self._walk_start(point)
+        for _ in range(4 * self._num_triangles + 16):
+            corners = self._triangles[triangle].tolist()
+            offset = self._random.randrange(3)
+            for step in range(3):
+                k = (offset + step) % 3
+                if _orient(vertices[corners[(k + 1) % 3]], vertices[corners[(k + 2) % 3]], point) < 0:
+                    neighbor = int(self._neighbors[triangle, k])
+                    if neighbor == -1:
+                        self._last_triangle = triangle
+                        return triangle, k
+                    triangle = neighbor
+                    break
+            else:
+                self._last_triangle = triangle
+                return triangle, -1
+        raise AssertionError("Walking the triangulation didn't end")
+
+    def _walk_start(self, point: "(float, float)") -> int:
+        """
+        Returns a triangle to start walking from: one touching the nearest of a sample of vertices
+        """
+        num_points = len(self._vertices)
+        sample = self._numpy_random.integers(num_points, size=int(num_points ** (1 / 3)) + 1)
+        sample = sample[self._vertex_triangle[sample] != -1]
+        if not len(sample):
+            return self._last_triangle
+        nearest = sample[np.argmin(((self._points[sample] - point) ** 2).sum(axis=1))]
+        return int(self._vertex_triangle[nearest])
+
+    def _next_hull_edge(self, triangle: int, k: int, forward: bool) -> "(int, int)":
+        """
+        Returns the hull edge after (or before) the hull edge opposite corner k of triangle,
+        as (triangle, corner opposite the edge), by rotating around their shared vertex
+        """
+        corners = self._triangles[triangle].tolist()
+        pivot = corners[(k + 2) % 3] if forward else corners[(k + 1) % 3]
+        # the edge leaving the pivot is opposite the corner after it, the edge entering it the one before
+        offset = 2 if forward else 1
+        while True:
+            k = (self._triangles[triangle].tolist().index(pivot) + offset) % 3
+            neighbor = int(self._neighbors[triangle, k])
+            if neighbor == -1:
+                return triangle, k
+            triangle = neighbor
+
+    def _hull_edges_visible_from(self, triangle: int, k: int, point: "(float, float)") -> "set[(int, int)]":
+        """
+        Returns the chain of hull edges that point is outside of, as (triangle, corner opposite the edge),
+        starting from one of them
+        """
+        vertices = self._vertices
+        visible = {(triangle, k)}
+        for forward in (True, False):
+            edge = (triangle, k)
+            while True:
+                edge = self._next_hull_edge(*edge, forward)
+                corners = self._triangles[edge[0]].tolist()
+                i, j = corners[(edge[1] + 1) % 3], corners[(edge[1] + 2) % 3]
+                if edge in visible or _orient(vertices[i], vertices[j], point) >= 0:
+                    break
+                visible.add(edge)
+        return visible
+
+    def _insert_vertex(self, vertex: int) -> "dict[int, list[int]]":
+        """
+        Inserts a point into the triangulation (Bowyer-Watson)
+        :return: The removed triangles (with their corners), the added ones are left in self._added
+        """
+        vertices = self._vertices
+        point = vertices[vertex]
+        self._added = []
+        triangle, outside_k = self._locate(point)
+        corners = self._triangles[triangle].tolist()
+        if outside_k == -1:
+            if point in (vertices[corners[0]], vertices[corners[1]], vertices[corners[2]]):
+                # a duplicate, left out of the triangulation
+                return {}
+            seeds = [triangle]
+            visible = set()
+        else:
+            visible = self._hull_edges_visible_from(triangle, outside_k, point)
+            # the triangles behind the visible edges are only replaced if point is in their circumcircle
+            seeds = [t for t, _ in visible if self._in_circumcircle(t, point)]
+
+        cavity = {}
+        stack = seeds
+        while stack:
+            t = stack.pop()
+            if t in cavity:
+                continue
+            cavity[t] = self._triangles[t].tolist()
+            for neighbor in self._neighbors[t].tolist():
+                if neighbor != -1 and neighbor not in cavity and self._in_circumcircle(neighbor, point):
+                    stack.append(neighbor)
+
+        # the edges the new triangles are built on (counter-clockwise around the cavity), with the triangle outside them
+        boundary = []
+        for t, corners in cavity.items():
+            for k, neighbor in enumerate(self._neighbors[t].tolist()):
+                if neighbor not in cavity and (t, k) not in visible:
+                    boundary.append((corners[(k + 1) % 3], corners[(k + 2) % 3], neighbor))
+        for t, k in visible:
+            if t not in cavity:
+                corners = self._triangles[t].tolist()
+                boundary.append((corners[(k + 2) % 3], corners[(k + 1) % 3], t))
+
+        for t in cavity:
+            self._alive[t] = False
+            self._free.append(t)
+        by_start, by_end = {}, {}
+        for i, j, outer in boundary:
+            if _orient(vertices[i], vertices[j], point) <= 0:
+                # point is on this edge of the hull, which is split instead
+                continue
+            t = self._new_triangle([i, j, vertex], [-1, -1, outer])
+            if outer != -1:
+                outer_corners = self._triangles[outer].tolist()
+                self._neighbors[outer, 3 - outer_corners.index(i) - outer_corners.index(j)] = t
+            by_start[i], by_end[j] = t, t
+            self._vertex_triangle[i] = self._vertex_triangle[j] = self._vertex_triangle[vertex] = t
+        for t in self._added:
+            i, j, _ = self._triangles[t].tolist()
+            # the edge j -> vertex is shared with the triangle starting at j, vertex -> i with the one ending at i
+            self._neighbors[t, 0] = by_start.get(j, -1)
+            self._neighbors[t, 1] = by_end.get(i, -1)
+        return cavity
+
+    def _in_circumcircle(self, triangle: int, point: "(float, float)") -> bool:
+        a, b, c = self._triangles[triangle].tolist()
+        return _in_circle(self._vertices[a], self._vertices[b], self._vertices[c], point)
+
+    def _new_triangle(self, corners: "list[int]", neighbors: "list[int]") -> int:
+        if self._free:
+            t = self._free.pop()
+        else:
+            t = self._num_triangles
+            self._num_triangles += 1
+            self._triangles = _grow(self._triangles, self._num_triangles)
+            self._neighbors = _grow(self._neighbors, self._num_triangles, fill=-1)
+            self._alive = _grow(self._alive, self._num_triangles, fill=False)
+        self._triangles[t] = corners
+        self._neighbors[t] = neighbors
+        self._alive[t] = True
+        self._added.append(t)
+        return t
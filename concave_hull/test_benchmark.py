@@ -0,0 +1,55 @@
+import json
+import tempfile
+import unittest
+import contextlib
+import io
+import os
+
+import numpy as np
+
+from concave_hull import benchmark
+
+
+class TestGenerateCloud(unittest.TestCase):
+    def test_sizes(self):
+        for kind in benchmark.CLOUDS:
+            with self.subTest(kind=kind):
+                self.assertEqual(benchmark.generate_cloud(kind, 500).shape, (500, 2))
+
+    def test_seed(self):
+        np.testing.assert_array_equal(benchmark.generate_cloud('clustered', 100, seed=3),
+                                      benchmark.generate_cloud('clustered', 100, seed=3))
+
+    def test_shaped_clouds_are_inside_the_example(self):
+        points = benchmark.generate_cloud('cshape', 1000)
+        self.assertTrue(benchmark.example_shape('cshape-full').contains(points).all())
+
+
+class TestRun(unittest.TestCase):
+    def test_results(self):
+        results = benchmark.run(['uniform', 'hshape'], [1000, 2000])
+        self.assertEqual(len(results['results']), 2 * 2 * 5)
+        self.assertEqual(results['results'][0]['stage'], 'read_points')
+        for result in results['results']:
+            self.assertGreaterEqual(result['seconds'], 0)
+            self.assertIsNotNone(result['peak_bytes'])
+        json.dumps(results)
+
+    def test_compare(self):
+        old = benchmark.run(['uniform'], [1000], measure_memory=False)
+        new = benchmark.run(['uniform'], [1000, 2000], measure_memory=False)
+        comparison = benchmark.compare(old, new)
+        self.assertEqual(len(comparison), 5)
+        self.assertIsNone(comparison[0]['peak_bytes_ratio'])
+        self.assertGreater(comparison[0]['seconds_ratio'], 0)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            with contextlib.redirect_stderr(io.StringIO()):
+                benchmark.main(['--clouds', 'uniform', '--sizes', '1e3', '--output', output])
+                benchmark.main(['--clouds', 'uniform', '--sizes', '1e3', '--no-memory', '--output', output,
+                                '--compare', output])
+            with open(output) as f:
+                results = json.load(f)
+        self.assertEqual(len(results['comparison']), 5)
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from concave_hull import hull
+from concave_hull.cache import HullCache, points_key
+
+
+def square_points(size):
+    return [(0, 0), (size, 0), (size, size), (0, size), (size / 2, size / 3)]
+
+
+class TestPointsKey(unittest.TestCase):
+    def test_same_points(self):
+        points = square_points(1)
+        self.assertEqual(points_key(points, alpha=1), points_key(np.array(points), alpha=1))
+
+    def test_different_points(self):
+        self.assertNotEqual(points_key(square_points(1)), points_key(square_points(2)))
+
+    def test_different_params(self):
+        points = square_points(1)
+        self.assertNotEqual(points_key(points, alpha=1), points_key(points, alpha=2))
+
+
+class TestHullCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_memory_hit(self):
+        cache = HullCache(self.directory)
+        points = square_points(1)
+        with mock.patch.object(hull, 'get_alpha_shape', wraps=hull.get_alpha_shape) as get_alpha_shape:
+            first = cache.get_alpha_shape(points, alpha=10)
+            second = cache.get_alpha_shape(points, alpha=10)
+        self.assertEqual(get_alpha_shape.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first, hull.get_alpha_shape(points, alpha=10))
+        stats = cache.stats
+        self.assertEqual((stats.memory_hits, stats.disk_hits, stats.misses), (1, 0, 1))
+        self.assertGreater(stats.seconds_saved, 0)
+
+    def test_disk_hit(self):
+        points = square_points(1)
+        expected = HullCache(self.directory).get_alpha_shape(points, alpha=10)
+        cache = HullCache(self.directory)
+        with mock.patch.object(hull, 'get_alpha_shape') as get_alpha_shape:
+            actual = cache.get_alpha_shape(points, alpha=10)
+            cache.get_alpha_shape(points, alpha=10)
+        get_alpha_shape.assert_not_called()
+        self.assertEqual(actual, expected)
+        stats = cache.stats
+        self.assertEqual((stats.memory_hits, stats.disk_hits, stats.misses), (1, 1, 0))
+
+    def test_params_are_part_of_the_key(self):
+        cache = HullCache(self.directory)
+        points = square_points(1)
+        cache.get_alpha_shape(points, alpha=10)
+        cache.get_alpha_shape(points, alpha=10, rings=True)
+        self.assertEqual(cache.stats.misses, 2)
+
+    def test_memory_items(self):
+        cache = HullCache(self.directory, memory_items=1)
+        cache.get_alpha_shape(square_points(1), alpha=10)
+        cache.get_alpha_shape(square_points(2), alpha=10)
+        cache.get_alpha_shape(square_points(1), alpha=10)
+        stats = cache.stats
+        self.assertEqual((stats.memory_hits, stats.disk_hits, stats.misses), (0, 1, 2))
+
+    def test_eviction(self):
+        cache = HullCache(self.directory)
+        first, second, third = (square_points(size) for size in (1, 2, 3))
+        key = lambda points: points_key(points, engine="numpy", alpha=10, rings=False)
+        cache.get_alpha_shape(first, alpha=10)
+        cache.get_alpha_shape(second, alpha=10)
+        paths = [cache._path(key(points)) for points in (first, second)]
+        for seconds, path in enumerate(paths):
+            os.utime(path, (seconds, seconds))
+        # room for two results, but not for three
+        cache.max_bytes = sum(os.path.getsize(path) for path in paths) * 5 // 4
+        # a hit in memory makes the first one more recent than the second
+        cache.get_alpha_shape(first, alpha=10)
+        cache.get_alpha_shape(third, alpha=10)
+        files = {os.path.join(self.directory, name) for name in os.listdir(self.directory)}
+        self.assertEqual(files, {cache._path(key(points)) for points in (first, third)})
+        self.assertEqual(cache.stats.memory_hits, 1)
+
+    def test_clear(self):
+        cache = HullCache(self.directory)
+        cache.get_alpha_shape(square_points(1), alpha=10)
+        cache.clear()
+        cache.get_alpha_shape(square_points(1), alpha=10)
+        self.assertEqual(cache.stats.misses, 2)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
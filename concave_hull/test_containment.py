@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+from matplotlib.path import Path
+
+from concave_hull import hull
+from concave_hull.containment import HullIndex, points_in_hull
+
+
+def square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+
+
+class TestHullIndex(unittest.TestCase):
+    def setUp(self):
+        self.queries = np.random.RandomState(0).rand(20000, 2) * 1.2 - 0.1
+
+    def test_matches_matplotlib(self):
+        angles = np.linspace(0, 2 * np.pi, 500, endpoint=False)
+        radii = 0.3 + 0.15 * np.sin(7 * angles)
+        vertices = np.column_stack([0.5 + radii * np.cos(angles), 0.5 + radii * np.sin(angles)])
+        expected = Path(vertices).contains_points(self.queries)
+        for num_slabs in [None, 1, 7, 1000]:
+            with self.subTest(num_slabs=num_slabs):
+                actual = HullIndex(vertices, num_slabs=num_slabs).contains(self.queries)
+                np.testing.assert_array_equal(actual, expected)
+
+    def test_holes(self):
+        rings = [square(0, 0, 1), square(0.25, 0.25, 0.5)]
+        actual = HullIndex(rings).contains(self.queries)
+        outer = Path(square(0, 0, 1)).contains_points(self.queries)
+        hole = Path(square(0.25, 0.25, 0.5)).contains_points(self.queries)
+        np.testing.assert_array_equal(actual, outer & ~hole)
+
+    def test_list_of_lists(self):
+        vertices = [list(vertex) for vertex in square(0, 0, 0.5)]
+        actual = HullIndex(vertices).contains(self.queries)
+        np.testing.assert_array_equal(actual, Path(square(0, 0, 0.5)).contains_points(self.queries))
+        self.assertTrue(actual.any())
+
+    def test_alpha_shape(self):
+        points = np.random.RandomState(1).rand(2000, 2)
+        # a ring with a channel to its middle, which the shape would fill if it were enclosed
+        points = points[(np.hypot(*(points - 0.5).T) > 0.25) & ((points[:, 0] < 0.5) | (abs(points[:, 1] - 0.5) > 0.1))]
+        rings = hull.get_alpha_shape(points, alpha=0.05, rings=True)
+        actual = points_in_hull(rings, self.queries)
+        self.assertFalse(actual[np.hypot(*(self.queries - 0.5).T) < 0.2].any())
+        self.assertTrue(actual[np.hypot(*(self.queries - 0.5).T) > 0.3].any())
+        self.assertFalse(actual[(self.queries < 0).any(axis=1) | (self.queries > 1).any(axis=1)].any())
+
+    def test_empty_hull(self):
+        self.assertFalse(HullIndex([]).contains(self.queries).any())
+
+    def test_no_queries(self):
+        self.assertEqual(HullIndex(square(0, 0, 1)).contains(np.empty((0, 2))).shape, (0,))
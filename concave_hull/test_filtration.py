@@ -0,0 +1,79 @@
+import os
+import unittest
+
+import numpy as np
+
+from concave_hull import hull
+from concave_hull.filtration import AlphaFiltration, _IntervalTree
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "examples")
+
+
+def read_example(name):
+    with open(os.path.join(EXAMPLES_DIR, name)) as f:
+        return hull.read_points(f)
+
+
+def edge_set(edges):
+    return {frozenset(edge) for edge in np.asarray(edges).tolist()}
+
+
+class TestAlphaFiltration(unittest.TestCase):
+    def setUp(self):
+        self.points = read_example('hshape')
+        self.filtration = AlphaFiltration(self.points)
+
+    def test_best_alpha_matches_get_alpha_shape(self):
+        expected = edge_set(hull.get_alpha_shape_edges(self.points))
+        actual = edge_set(self.filtration.edges_at())
+        self.assertEqual(actual, expected)
+
+    def test_edges_match_get_alpha_shape(self):
+        for alpha in [0.01, 0.03, 0.05, 0.1, 1, 100]:
+            with self.subTest(alpha=alpha):
+                expected = edge_set(hull.get_alpha_shape_edges(self.points, alpha=alpha))
+                actual = edge_set(self.filtration.edges_at(alpha))
+                self.assertEqual(actual, expected)
+
+    def test_shape(self):
+        alpha = 0.1
+        expected = hull.get_alpha_shape(self.points, alpha=alpha, rings=True)
+        actual = self.filtration.shape(alpha)
+        self.assertEqual({frozenset(ring) for ring in actual}, {frozenset(ring) for ring in expected})
+
+    def test_area_matches_polygon_area(self):
+        for alpha in [0.03, 0.05, 0.1, 1]:
+            with self.subTest(alpha=alpha):
+                self.assertAlmostEqual(self.filtration.area(alpha), hull.polygon_area(self.filtration.shape(alpha)))
+
+    def test_area_of_array(self):
+        alphas = np.array([0, 0.05, 1, np.inf])
+        actual = self.filtration.area(alphas)
+        expected = [self.filtration.area(alpha) for alpha in alphas]
+        np.testing.assert_allclose(actual, expected)
+        self.assertEqual(actual[0], 0)
+
+    def test_area_curve_is_increasing(self):
+        alphas, areas = self.filtration.area_curve()
+        self.assertEqual(len(alphas), len(areas))
+        self.assertTrue((np.diff(alphas) >= 0).all())
+        self.assertTrue((np.diff(areas) >= 0).all())
+
+    def test_triangles_at(self):
+        self.assertEqual(len(self.filtration.triangles_at(0)), 0)
+        self.assertEqual(len(self.filtration.triangles_at(np.inf)), len(self.filtration.triangles))
+
+
+class TestIntervalTree(unittest.TestCase):
+    def test_stab_matches_scan(self):
+        rng = np.random.default_rng(0)
+        starts = rng.random(5000)
+        ends = starts + rng.exponential(0.05, len(starts))
+        ends[::7] = np.inf
+        ends[::11] = starts[::11]
+        tree = _IntervalTree(starts, ends)
+        for value in [-1, 0, starts[3], 0.5, ends[5], 1.2, np.inf]:
+            with self.subTest(value=value):
+                expected = np.flatnonzero((starts <= value) & (value < ends))
+                np.testing.assert_array_equal(tree.stab(value), expected)
@@ -1,11 +1,21 @@
+import os
+import sys
+import stat
+import tempfile
 import unittest
 import itertools
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
 from concave_hull import hull
 
 import numpy as np
 
 
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "examples")
+CSHAPE_HULL_EDGES = [((0.761786600496278, 0.8596938775510203), (0.7062034739454095, 0.8596938775510203)), ((0.761786600496278, 0.8596938775510203), (0.7478908188585608, 0.8265306122448979)), ((0.7478908188585608, 0.8265306122448979), (0.7320099255583127, 0.8035714285714285)), ((0.7320099255583127, 0.8035714285714285), (0.6903225806451613, 0.7499999999999999)), ((0.6903225806451613, 0.7499999999999999), (0.6406947890818859, 0.7244897959183673)), ((0.6089330024813896, 0.711734693877551), (0.6406947890818859, 0.7244897959183673)), ((0.6089330024813896, 0.711734693877551), (0.5533498759305211, 0.6556122448979591)), ((0.5533498759305211, 0.6556122448979591), (0.5176178660049628, 0.6045918367346939)), ((0.4818858560794045, 0.33418367346938777), (0.5255583126550869, 0.2780612244897959)), ((0.46203473945409435, 0.510204081632653), (0.5176178660049628, 0.6045918367346939)), ((0.44813895781637725, 0.4489795918367347), (0.46203473945409435, 0.510204081632653)), ((0.4540942928039703, 0.38520408163265313), (0.4818858560794045, 0.33418367346938777)), ((0.44813895781637725, 0.4489795918367347), (0.4540942928039703, 0.38520408163265313)), ((0.6625310173697271, 0.17602040816326536), (0.7359801488833747, 0.16836734693877553)), ((0.5255583126550869, 0.2780612244897959), (0.5652605459057072, 0.20918367346938777)), ((0.5652605459057072, 0.20918367346938777), (0.5692307692307693, 0.20408163265306123)), ((0.6228287841191067, 0.17091836734693883), (0.5692307692307693, 0.20408163265306123)), ((0.6228287841191067, 0.17091836734693883), (0.6625310173697271, 0.17602040816326536)), ((0.7359801488833747, 0.16836734693877553), (0.7161290322580646, 0.13775510204081637)), ((0.7161290322580646, 0.13775510204081637), (0.6307692307692307, 0.14795918367346944)), ((0.6307692307692307, 0.14795918367346944), (0.5553349875930521, 0.16836734693877553)), ((0.45012406947890826, 0.2142857142857143), (0.4143920595533499, 0.22704081632653061)), ((0.4957816377171216, 0.201530612244898), (0.45012406947890826, 0.2142857142857143)), ((0.4957816377171216, 0.201530612244898), (0.5553349875930521, 0.16836734693877553)), ((0.4143920595533499, 0.22704081632653061), (0.38064516129032266, 0.24489795918367352)), ((0.315136476426799, 0.3010204081632653), (0.38064516129032266, 0.24489795918367352)), ((0.315136476426799, 0.3010204081632653), (0.2714640198511167, 0.33673469387755106)), ((0.2714640198511167, 0.33673469387755106), (0.2635235732009925, 0.3545918367346939)), ((0.2635235732009925, 0.3545918367346939), (0.2774193548387097, 0.41581632653061223)), ((0.2357320099255583, 0.5076530612244897), (0.2774193548387097, 0.41581632653061223)), ((0.2853598014888338, 0.5765306122448979), (0.2357320099255583, 0.5076530612244897)), ((0.2853598014888338, 0.5765306122448979), (0.2595533498759305, 0.6581632653061223)), ((0.2595533498759305, 0.6581632653061223), (0.319106699751861, 0.6964285714285714)), ((0.319106699751861, 0.6964285714285714), (0.36674937965260546, 0.7321428571428571)), ((0.39454094292803976, 0.8112244897959183), (0.36674937965260546, 0.7321428571428571)), ((0.39454094292803976, 0.8112244897959183), (0.5156327543424318, 0.8520408163265305)), ((0.6029776674937966, 0.7806122448979591), (0.5156327543424318, 0.8520408163265305)), ((0.6029776674937966, 0.7806122448979591), (0.7062034739454095, 0.8596938775510203))]
+
+
 class TestPairs(unittest.TestCase):
     def test_two(self):
         items = [1, 5]
@@ -47,11 +57,170 @@ class TestOrderEdges(unittest.TestCase):
         self.assert_ordered(actual, edges)
 
     def test_result_from_hull_cshape(self):
-        edges = [((0.761786600496278, 0.8596938775510203), (0.7062034739454095, 0.8596938775510203)), ((0.761786600496278, 0.8596938775510203), (0.7478908188585608, 0.8265306122448979)), ((0.7478908188585608, 0.8265306122448979), (0.7320099255583127, 0.8035714285714285)), ((0.7320099255583127, 0.8035714285714285), (0.6903225806451613, 0.7499999999999999)), ((0.6903225806451613, 0.7499999999999999), (0.6406947890818859, 0.7244897959183673)), ((0.6089330024813896, 0.711734693877551), (0.6406947890818859, 0.7244897959183673)), ((0.6089330024813896, 0.711734693877551), (0.5533498759305211, 0.6556122448979591)), ((0.5533498759305211, 0.6556122448979591), (0.5176178660049628, 0.6045918367346939)), ((0.4818858560794045, 0.33418367346938777), (0.5255583126550869, 0.2780612244897959)), ((0.46203473945409435, 0.510204081632653), (0.5176178660049628, 0.6045918367346939)), ((0.44813895781637725, 0.4489795918367347), (0.46203473945409435, 0.510204081632653)), ((0.4540942928039703, 0.38520408163265313), (0.4818858560794045, 0.33418367346938777)), ((0.44813895781637725, 0.4489795918367347), (0.4540942928039703, 0.38520408163265313)), ((0.6625310173697271, 0.17602040816326536), (0.7359801488833747, 0.16836734693877553)), ((0.5255583126550869, 0.2780612244897959), (0.5652605459057072, 0.20918367346938777)), ((0.5652605459057072, 0.20918367346938777), (0.5692307692307693, 0.20408163265306123)), ((0.6228287841191067, 0.17091836734693883), (0.5692307692307693, 0.20408163265306123)), ((0.6228287841191067, 0.17091836734693883), (0.6625310173697271, 0.17602040816326536)), ((0.7359801488833747, 0.16836734693877553), (0.7161290322580646, 0.13775510204081637)), ((0.7161290322580646, 0.13775510204081637), (0.6307692307692307, 0.14795918367346944)), ((0.6307692307692307, 0.14795918367346944), (0.5553349875930521, 0.16836734693877553)), ((0.45012406947890826, 0.2142857142857143), (0.4143920595533499, 0.22704081632653061)), ((0.4957816377171216, 0.201530612244898), (0.45012406947890826, 0.2142857142857143)), ((0.4957816377171216, 0.201530612244898), (0.5553349875930521, 0.16836734693877553)), ((0.4143920595533499, 0.22704081632653061), (0.38064516129032266, 0.24489795918367352)), ((0.315136476426799, 0.3010204081632653), (0.38064516129032266, 0.24489795918367352)), ((0.315136476426799, 0.3010204081632653), (0.2714640198511167, 0.33673469387755106)), ((0.2714640198511167, 0.33673469387755106), (0.2635235732009925, 0.3545918367346939)), ((0.2635235732009925, 0.3545918367346939), (0.2774193548387097, 0.41581632653061223)), ((0.2357320099255583, 0.5076530612244897), (0.2774193548387097, 0.41581632653061223)), ((0.2853598014888338, 0.5765306122448979), (0.2357320099255583, 0.5076530612244897)), ((0.2853598014888338, 0.5765306122448979), (0.2595533498759305, 0.6581632653061223)), ((0.2595533498759305, 0.6581632653061223), (0.319106699751861, 0.6964285714285714)), ((0.319106699751861, 0.6964285714285714), (0.36674937965260546, 0.7321428571428571)), ((0.39454094292803976, 0.8112244897959183), (0.36674937965260546, 0.7321428571428571)), ((0.39454094292803976, 0.8112244897959183), (0.5156327543424318, 0.8520408163265305)), ((0.6029776674937966, 0.7806122448979591), (0.5156327543424318, 0.8520408163265305)), ((0.6029776674937966, 0.7806122448979591), (0.7062034739454095, 0.8596938775510203))]
+        edges = CSHAPE_HULL_EDGES
         actual = hull.order_edges(edges)
         self.assert_ordered(actual, edges)
 
 
+def read_example(name):
+    with open(os.path.join(EXAMPLES_DIR, name)) as f:
+        return hull.read_points(f)
+
+
+class TestGetAlphaShape(unittest.TestCase):
+    def test_numpy_engine_matches_hull_program(self):
+        points = read_example('cshape-full')
+        actual = hull.get_alpha_shape(points, engine='numpy')
+        # the same vertices, starting from the same one, in the same direction
+        self.assertEqual(actual, hull.edges_to_vertices(hull.order_edges(CSHAPE_HULL_EDGES)))
+
+    def test_enclosed_regions_are_filled(self):
+        # like the hull program, the shape is all the alpha complex encloses, so the H is a single ring
+        points = read_example('hshape')
+        rings = hull.get_alpha_shape(points, rings=True)
+        self.assertEqual(len(rings), 1)
+        self.assertEqual(hull.get_alpha_shape(points), rings[0])
+        self.assertEqual(len(rings[0]), 80)
+        self.assertEqual(rings[0][0], points[min(i for edge in hull.get_alpha_shape_edges(points) for i in edge)])
+
+    def test_edges_are_indices(self):
+        points = read_example('cshape-full')
+        expected = {frozenset(edge) for edge in CSHAPE_HULL_EDGES}
+        actual = {frozenset((points[i], points[j])) for i, j in hull.get_alpha_shape_edges(points)}
+        self.assertEqual(actual, expected)
+
+    def test_huge_alpha_is_convex_hull(self):
+        points = [(0, 0), (1, 0), (1, 1), (0, 1), (0.5, 0.5)]
+        actual = hull.get_alpha_shape(points, alpha=100)
+        self.assertEqual(set(actual), {(0, 0), (1, 0), (1, 1), (0, 1)})
+
+    def test_array(self):
+        points = read_example('cshape-full')
+        actual = hull.get_alpha_shape(np.array(points))
+        self.assertEqual(set(actual), hull.get_vertices_set(CSHAPE_HULL_EDGES))
+
+    def test_unknown_engine(self):
+        self.assertRaises(ValueError, hull.get_alpha_shape, [(0, 0), (1, 0), (0, 1)], engine='nope')
+
+    def test_subprocess_engine_does_not_take_alpha(self):
+        self.assertRaises(ValueError, hull.get_alpha_shape, [(0, 0), (1, 0), (0, 1)], engine='subprocess', alpha=1)
+
+    @unittest.skipUnless(os.path.exists(hull.hull_path), "hull program is not built")
+    def test_subprocess_engine_matches_numpy_engine(self):
+        for name in ['cshape-full', 'hshape']:
+            with self.subTest(name=name):
+                points = read_example(name)
+                self.assertEqual(hull.get_alpha_shape(points, engine='subprocess'),
+                                 hull.get_alpha_shape(points, engine='numpy'))
+
+
+FAKE_HULL_PROGRAM = """#!{executable}
+import sys
+num_points = len(sys.stdin.read().splitlines())
+with open('hout-alf', 'w') as output:
+    output.write('header\\n')
+    for i in range(num_points):
+        output.write('{{0}} {{1}}\\n'.format(i, (i + 1) % num_points))
+"""
+
+
+class TestSubprocessEngineIsolation(unittest.TestCase):
+    def setUp(self):
+        work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(work_dir.cleanup)
+        self.work_dir = work_dir.name
+        program = os.path.join(self.work_dir, 'fake-hull')
+        with open(program, 'w') as f:
+            f.write(FAKE_HULL_PROGRAM.format(executable=sys.executable))
+        os.chmod(program, os.stat(program).st_mode | stat.S_IEXEC)
+        patcher = mock.patch.object(hull, 'hull_path', program)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_output_is_not_left_in_cwd(self):
+        points = [(0, 0), (1, 0), (1, 1), (0, 1)]
+        cwd = os.getcwd()
+        os.chdir(self.work_dir)
+        try:
+            actual = hull.get_alpha_shape(points, engine='subprocess')
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(set(actual), set(points))
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, hull.output_file)))
+
+    def test_concurrent_calls(self):
+        point_sets = [[(i, 0), (i + 1, 0), (i + 1, 1), (i, 1)][:3 + i % 2] for i in range(16)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            actual = list(executor.map(lambda points: hull.get_alpha_shape(points, engine='subprocess'), point_sets))
+        for points, vertices in zip(point_sets, actual):
+            self.assertEqual(set(vertices), set(points))
+
+
+class TestGetAlphaShapes(unittest.TestCase):
+    def test_in_order(self):
+        point_sets = [[(0, 0), (i, 0), (i, i), (0, i), (i / 2, i / 2)] for i in range(1, 5)]
+        actual = hull.get_alpha_shapes(point_sets, alpha=100, max_workers=2)
+        expected = [hull.get_alpha_shape(points, alpha=100) for points in point_sets]
+        self.assertEqual([set(vertices) for vertices in actual], [set(vertices) for vertices in expected])
+
+
+def square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+
+
+class TestOrderEdgeRings(unittest.TestCase):
+    def assert_rings(self, rings, original):
+        for ring in rings:
+            for ((v1, v2), (w1, w2)) in hull.pairs(ring + ring[:1]):
+                self.assertEqual(v2, w1)
+        self.assertEqual(sum(map(len, rings)), len(original))
+        self.assertEqual({frozenset(edge) for ring in rings for edge in ring}, {frozenset(edge) for edge in original})
+
+    def test_single_ring(self):
+        edges = hull.pairs(square(0, 0, 1) + [(0, 0)])
+        actual = hull.order_edge_rings(edges[::-1])
+        self.assertEqual(len(actual), 1)
+        self.assert_rings(actual, edges)
+
+    def test_two_components(self):
+        edges = hull.pairs(square(0, 0, 1) + [(0, 0)]) + hull.pairs(square(5, 5, 1) + [(5, 5)])
+        actual = hull.order_edge_rings(edges)
+        self.assertEqual(len(actual), 2)
+        self.assert_rings(actual, edges)
+
+    def test_hole_keeps_orientation(self):
+        outer = hull.pairs(square(0, 0, 10) + [(0, 0)])
+        hole = [(v2, v1) for v1, v2 in hull.pairs(square(2, 2, 1) + [(2, 2)])]
+        actual = hull.order_edge_rings(hole[1:] + outer[::-1] + hole[:1])
+        self.assertEqual(len(actual), 2)
+        self.assert_rings(actual, outer + hole)
+        self.assertEqual({frozenset(ring) for ring in actual}, {frozenset(outer), frozenset(hole)})
+
+    def test_open_chain(self):
+        edges = [((0, 0), (1, 0)), ((1, 0), (1, 1))]
+        self.assertRaises(AssertionError, hull.order_edge_rings, edges)
+
+    def test_order_edges_with_several_rings(self):
+        edges = hull.pairs(square(0, 0, 1) + [(0, 0)]) + hull.pairs(square(5, 5, 1) + [(5, 5)])
+        self.assertRaises(AssertionError, hull.order_edges, edges)
+
+    def test_many_edges(self):
+        angles = np.linspace(0, 2 * np.pi, 50000, endpoint=False)
+        vertices = list(zip(np.cos(angles), np.sin(angles)))
+        edges = hull.pairs(vertices + vertices[:1])
+        shuffled = [edges[i] for i in np.random.RandomState(0).permutation(len(edges))]
+        actual = hull.order_edge_rings(shuffled)
+        self.assertEqual(len(actual), 1)
+        self.assert_rings(actual, edges)
+
+    def test_alpha_shape_rings(self):
+        points = read_example('hshape')
+        edges = hull.get_alpha_shape_edges(points)
+        actual = hull.get_alpha_shape(points, rings=True)
+        self.assertEqual(sum(map(len, actual)), len(edges))
+        self.assertEqual(set(itertools.chain(*actual)), {points[i] for edge in edges for i in edge})
+
+
 class TestEdgesToVertices(unittest.TestCase):
     def test_ordered(self):
         edges = [
@@ -64,15 +233,63 @@ class TestEdgesToVertices(unittest.TestCase):
         actual = hull.edges_to_vertices(edges)
         self.assertEqual(expected, actual)
 
+    def test_rings(self):
+        rings = [hull.pairs(square(0, 0, 1) + [(0, 0)]), hull.pairs(square(5, 5, 1) + [(5, 5)])]
+        expected = [square(0, 0, 1), square(5, 5, 1)]
+        actual = hull.edges_to_vertices(rings)
+        self.assertEqual(expected, actual)
+
+
+class TestPlotHull(unittest.TestCase):
+    def test_rings(self):
+        fig, ax = hull.plt.subplots()
+        self.addCleanup(hull.plt.close, fig)
+        points = square(0, 0, 10) + square(2, 2, 1)
+        hull.plot_hull(ax, points, [square(0, 0, 10), square(2, 2, 1)[::-1]])
+        self.assertEqual(len(ax.patches), 1)
+        self.assertEqual(len(ax.patches[0].get_path().vertices), 10)
+
+    def test_array_vertices(self):
+        fig, ax = hull.plt.subplots()
+        self.addCleanup(hull.plt.close, fig)
+        vertices = np.array(square(1, 1, 2))
+        hull.plot_hull(ax, vertices, vertices)
+        np.testing.assert_array_equal(ax.patches[0].get_path().vertices, np.concatenate([vertices, vertices[:1]]))
+
+    def test_decimate(self):
+        fig, ax = hull.plt.subplots()
+        self.addCleanup(hull.plt.close, fig)
+        points = np.random.RandomState(0).rand(200000, 2)
+        hull.plot_hull(ax, points, square(0, 0, 1), decimate=True)
+        fig.canvas.draw()
+        collection, = ax.collections
+        bbox = ax.get_window_extent()
+        self.assertTrue(collection.get_rasterized())
+        self.assertLessEqual(len(collection.get_offsets()), (bbox.width + 1) * (bbox.height + 1))
+        self.assertGreater(len(collection.get_offsets()), 0)
+        self.assertEqual(len(ax.lines), 1)
+        self.assertEqual(collection.decimations, 1)
+
+        fig.canvas.draw()
+        self.assertEqual(collection.decimations, 1)
+        ax.set_xlim(0.4, 0.5)
+        ax.set_ylim(0.4, 0.5)
+        fig.canvas.draw()
+        self.assertEqual(collection.decimations, 2)
+        offsets = collection.get_offsets()
+        self.assertTrue(((offsets >= 0.3) & (offsets <= 0.6)).all())
+        ax.set_xlim(0.45, 0.55)
+        fig.canvas.draw()
+        self.assertEqual(collection.decimations, 2)
+
 
 class TestPolygonArea(unittest.TestCase):
     def test_circle(self):
         x = np.arange(0, 1, 0.00001)
         y = np.sqrt(1-x**2)
-        points = list(zip(x, y))
-        edges = hull.pairs(points)
+        vertices = [(0, 0)] + list(zip(x, y))
         expected_area = np.pi / 4
-        actual_area = hull.polygon_area(edges)
+        actual_area = hull.polygon_area(vertices)
         self.assertAlmostEqual(expected_area, actual_area, places=2)
 
     def test_rectangle(self):
@@ -80,4 +297,64 @@ class TestPolygonArea(unittest.TestCase):
         edges = hull.pairs(vertices)
         expected_area = 50
         actual_area = hull.polygon_area(edges)
-        self.assertEqual(expected_area, actual_area)
\ No newline at end of file
+        self.assertEqual(expected_area, actual_area)
+
+    def test_list_of_lists(self):
+        self.assertEqual(hull.polygon_area([[0, 0], [4, 0], [4, 3]]), 6)
+
+    def test_not_convex(self):
+        vertices = [(0, 0), (4, 0), (4, 4), (2, 1), (0, 4)]
+        expected_area = 10
+        actual_area = hull.polygon_area(np.array(vertices))
+        self.assertEqual(expected_area, actual_area)
+
+    def test_rings_with_hole(self):
+        rings = [square(0, 0, 10), square(2, 2, 1)[::-1]]
+        expected_area = 99
+        actual_area = hull.polygon_area(rings)
+        self.assertEqual(expected_area, actual_area)
+
+
+class TestPolygonMetrics(unittest.TestCase):
+    def test_pack_polygons(self):
+        vertices, offsets = hull.pack_polygons([square(0, 0, 1), [], square(5, 5, 2)])
+        self.assertEqual(offsets.tolist(), [0, 4, 4, 8])
+        np.testing.assert_array_equal(vertices, square(0, 0, 1) + square(5, 5, 2))
+
+    def test_metrics(self):
+        polygons = [square(0, 0, 1), [], square(5, 5, 2)[::-1], [(0, 0), (4, 0), (4, 4), (2, 1), (0, 4)]]
+        actual = hull.polygon_metrics(*hull.pack_polygons(polygons))
+        np.testing.assert_allclose(actual.area, [1, 0, 4, 10])
+        np.testing.assert_allclose(actual.perimeter, [4, 0, 8, 12 + 2 * np.hypot(2, 3)])
+        np.testing.assert_allclose(actual.centroid[[0, 2]], [[0.5, 0.5], [6, 6]])
+        self.assertTrue(np.isnan(actual.centroid[1]).all())
+
+    def test_matches_polygon_area(self):
+        random = np.random.RandomState(0)
+        polygons = [random.rand(random.randint(3, 10), 2) for _ in range(100)]
+        actual = hull.polygon_metrics(*hull.pack_polygons(polygons))
+        np.testing.assert_allclose(actual.area, [hull.polygon_area(polygon) for polygon in polygons])
+
+
+class TestReadPoints(unittest.TestCase):
+    def test_array_matches_list(self):
+        with open(os.path.join(EXAMPLES_DIR, 'hshape')) as f:
+            actual = hull.read_points_array(f, chunk_size=10)
+        self.assertEqual(actual.dtype, np.float64)
+        self.assertTrue(actual.flags.c_contiguous)
+        np.testing.assert_array_equal(actual, read_example('hshape'))
+
+    def test_chunks(self):
+        lines = ["{0} {1}\n".format(i, -i) for i in range(10)]
+        actual = list(hull.iter_point_chunks(lines, chunk_size=4))
+        self.assertEqual([len(chunk) for chunk in actual], [4, 4, 2])
+        np.testing.assert_array_equal(np.concatenate(actual), [(i, -i) for i in range(10)])
+
+    def test_empty(self):
+        self.assertEqual(hull.read_points_array([]).shape, (0, 2))
+
+    def test_malformed(self):
+        self.assertRaises(ValueError, hull.read_points_array, ["1 2", "3"])
+        # the right total number of values, split across lines the wrong way
+        self.assertRaises(ValueError, hull.read_points_array, ["1 2 3", "4"])
+        self.assertRaises(ValueError, hull.read_points_array, ["1 2 3", "4 5 6"])
@@ -0,0 +1,106 @@
+import time
+import random
+import unittest
+
+import numpy as np
+
+from concave_hull import hull
+from concave_hull.incremental import IncrementalHull
+
+
+def ring_sets(rings):
+    # compare edges, since how rings split at a shared vertex may differ
+    return {frozenset(edge) for ring in rings for edge in hull.pairs(ring + ring[:1])}
+
+
+class TestIncrementalHull(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.points = random.rand(2000, 2)
+        self.points = self.points[np.hypot(*(self.points - 0.5).T) > 0.2]
+
+    def test_matches_get_alpha_shape(self):
+        incremental = IncrementalHull()
+        self.addCleanup(incremental.close)
+        for batch in np.array_split(self.points, 5):
+            actual = incremental.add_points(batch)
+            expected = hull.get_alpha_shape(incremental.points, rings=True)
+            self.assertEqual(ring_sets(actual), ring_sets(expected))
+
+    def test_fixed_alpha(self):
+        incremental = IncrementalHull(self.points[:100], alpha=0.05)
+        self.addCleanup(incremental.close)
+        actual = incremental.add_points(self.points[100:])
+        expected = hull.get_alpha_shape(self.points, alpha=0.05, rings=True)
+        self.assertEqual(ring_sets(actual), ring_sets(expected))
+        self.assertEqual(incremental.shape, actual)
+
+    def test_waits_for_enough_points(self):
+        incremental = IncrementalHull()
+        self.addCleanup(incremental.close)
+        self.assertEqual(incremental.add_points([(0, 0), (1, 0)]), [])
+        self.assertEqual(incremental.add_points([(2, 0)]), [])
+        self.assertEqual(len(incremental.points), 3)
+        self.assertNotEqual(incremental.add_points([(0, 1), (1, 2)]), [])
+
+    def test_latencies(self):
+        incremental = IncrementalHull()
+        self.addCleanup(incremental.close)
+        for batch in np.array_split(self.points, 3):
+            incremental.add_points(batch)
+        self.assertEqual([num_points for num_points, _ in incremental.latencies],
+                         np.cumsum([len(batch) for batch in np.array_split(self.points, 3)]).tolist())
+        self.assertTrue(all(seconds >= 0 for _, seconds in incremental.latencies))
+
+    def test_insertion_matches_get_alpha_shape(self):
+        for alpha in [0.05, None]:
+            with self.subTest(alpha=alpha):
+                incremental = IncrementalHull(self.points[:500], alpha=alpha)
+                self.addCleanup(incremental.close)
+                for first in range(500, 800, 7):
+                    actual = incremental.add_points(self.points[first:first + 7])
+                expected = hull.get_alpha_shape(incremental.points, alpha=alpha, rings=True)
+                self.assertEqual(ring_sets(actual), ring_sets(expected))
+                self.assertEqual({frozenset(triangle) for triangle in incremental.triangles.tolist()},
+                                 {frozenset(triangle) for triangle in hull.delaunay_triangles(incremental.points).tolist()})
+
+    def test_insertion_outside_the_hull(self):
+        # every batch grows the hull
+        points = self.points * np.linspace(0.1, 3, len(self.points))[:, None]
+        incremental = IncrementalHull(points[:50], alpha=0.3)
+        self.addCleanup(incremental.close)
+        for first in range(50, 500, 3):
+            actual = incremental.add_points(points[first:first + 3])
+        expected = hull.get_alpha_shape(incremental.points, alpha=0.3, rings=True)
+        self.assertEqual(ring_sets(actual), ring_sets(expected))
+
+    def test_duplicates(self):
+        incremental = IncrementalHull(self.points[:500], alpha=0.1)
+        self.addCleanup(incremental.close)
+        actual = incremental.add_points(self.points[:10])
+        self.assertEqual(len(incremental.points), 510)
+        self.assertEqual(ring_sets(actual), ring_sets(hull.get_alpha_shape(self.points[:500], alpha=0.1, rings=True)))
+
+    def test_global_random_state_is_untouched(self):
+        python_state, numpy_state = random.getstate(), np.random.get_state()
+        incremental = IncrementalHull(self.points[:100], alpha=0.1)
+        self.addCleanup(incremental.close)
+        for first in range(100, 300, 10):
+            incremental.add_points(self.points[first:first + 10])
+        self.assertEqual(random.getstate(), python_state)
+        np.testing.assert_array_equal(np.random.get_state()[1], numpy_state[1])
+        self.assertEqual(np.random.get_state()[2:], numpy_state[2:])
+
+    def test_faster_than_recomputing(self):
+        random = np.random.RandomState(1)
+        points = random.rand(50000, 2)
+        incremental = IncrementalHull(points, alpha=0.05)
+        self.addCleanup(incremental.close)
+        for _ in range(5):
+            incremental.add_points(random.rand(10, 2))
+        update = min(seconds for _, seconds in incremental.latencies[1:])
+        start = time.perf_counter()
+        hull.get_alpha_shape(incremental.points, alpha=0.05, rings=True)
+        recompute = time.perf_counter() - start
+        # measured ~1000x with 400k points (5ms per update of 10 points, 5s to recompute)
+        self.assertLess(update * 20, recompute)
@@ -1,8 +1,405 @@
-from django.template import Engine, Context, Template
+import os
+import time
+import itertools
+import threading
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.template import Engine, Context, VariableDoesNotExist
+from django.template.base import TextNode
+from django.template.defaulttags import ForNode, IfNode, WithNode, AutoEscapeControlNode
+from django.template.loader_tags import BlockNode, ExtendsNode, BlockContext, BLOCK_CONTEXT_KEY
 from django.conf import settings
 from django.shortcuts import render
 
 settings.configure()
+# loads the apps, which rendering localized values (e.g. numbers) requires
+django.setup()
+
+
+TemplateCacheStats = collections.namedtuple('TemplateCacheStats', ['hits', 'misses', 'evictions', 'size'])
+RenderStats = collections.namedtuple('RenderStats', ['renders', 'seconds', 'renders_per_second'])
+
+
+# the number of characters render_stream collects before yielding them
+STREAM_CHUNK_SIZE = 8192
+
+
+# _iter_template and the _iter_*_node functions mirror the render methods of Template and the nodes of Django 5.2
+# (django/template/base.py, defaulttags.py and loader_tags.py), and have to follow them when they change:
+# TestStreamTemplate renders both ways on the installed Django, so a difference fails the tests
+def _iter_template(template, context):
+    """Same as template.render(context), but yields the output of every node as it is rendered"""
+    with context.render_context.push_state(template):
+        if context.template is None:
+            with context.bind_template(template):
+                context.template_name = template.name
+                yield from _iter_nodelist(template.nodelist, context)
+        else:
+            yield from _iter_nodelist(template.nodelist, context)
+
+
+def _iter_nodelist(nodelist, context):
+    """
+    Yields the output of every node, going into for loops, if, with, autoescape, block and extends tags
+    (any other node is rendered whole)
+    """
+    for node in nodelist:
+        if isinstance(node, ForNode):
+            outputs = _iter_for_node(node, context)
+        elif isinstance(node, IfNode):
+            outputs = _iter_if_node(node, context)
+        elif isinstance(node, WithNode):
+            outputs = _iter_with_node(node, context)
+        elif isinstance(node, AutoEscapeControlNode):
+            outputs = _iter_autoescape_node(node, context)
+        elif isinstance(node, BlockNode):
+            outputs = _iter_block_node(node, context)
+        elif isinstance(node, ExtendsNode):
+            outputs = _iter_extends_node(node, context)
+        else:
+            yield node.render_annotated(context)
+            continue
+        yield from _iter_annotated(node, outputs, context)
+
+
+def _iter_annotated(node, outputs, context):
+    """Same as node.render_annotated, for the outputs of a node yielded as it is rendered"""
+    try:
+        yield from outputs
+    except Exception as e:
+        if context.template.engine.debug:
+            # the innermost node that raised is the culprit
+            if not hasattr(e, '_culprit_node'):
+                e._culprit_node = node
+            if not hasattr(e, 'template_debug') and context.render_context.template.origin == e._culprit_node.origin:
+                e.template_debug = context.render_context.template.get_exception_info(e, e._culprit_node.token)
+        raise
+
+
+def _iter_with_node(node, context):
+    """Same as WithNode.render, but yields the output of its nodes as they are rendered"""
+    values = {key: value.resolve(context) for key, value in node.extra_context.items()}
+    with context.push(**values):
+        yield from _iter_nodelist(node.nodelist, context)
+
+
+def _iter_autoescape_node(node, context):
+    """Same as AutoEscapeControlNode.render, but yields the output of its nodes as they are rendered"""
+    old_setting = context.autoescape
+    context.autoescape = node.setting
+    try:
+        yield from _iter_nodelist(node.nodelist, context)
+    finally:
+        context.autoescape = old_setting
+
+
+def _iter_block_node(node, context):
+    """Same as BlockNode.render, but yields the output of the (possibly overriding) block as it is rendered"""
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context['block'] = node
+            yield from _iter_nodelist(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        # a new block, so the context isn't stored on the shared (compiled) one
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context['block'] = block
+        yield from _iter_nodelist(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def _iter_extends_node(node, context):
+    """Same as ExtendsNode.render, but yields the output of the parent template as it is rendered"""
+    compiled_parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    # the blocks of the root template (the first one not extending another) are the defaults
+    for parent_node in compiled_parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({block.name: block
+                                          for block in compiled_parent.nodelist.get_nodes_by_type(BlockNode)})
+            break
+    with context.render_context.push_state(compiled_parent, isolated_context=False):
+        yield from _iter_nodelist(compiled_parent.nodelist, context)
+
+
+def _iter_if_node(node, context):
+    """Same as IfNode.render, but yields the output of the chosen branch as it is rendered"""
+    for condition, nodelist in node.conditions_nodelists:
+        if condition is not None:
+            try:
+                match = condition.eval(context)
+            except VariableDoesNotExist:
+                match = None
+        else:
+            match = True
+        if match:
+            yield from _iter_nodelist(nodelist, context)
+            return
+
+
+def _iter_for_node(node, context):
+    """Same as ForNode.render, but yields the output of every iteration as it is rendered"""
+    parentloop = context['forloop'] if 'forloop' in context else {}
+    with context.push():
+        values = node.sequence.resolve(context, ignore_failures=True)
+        if values is None:
+            values = []
+        if not hasattr(values, '__len__'):
+            values = list(values)
+        len_values = len(values)
+        if len_values < 1:
+            yield from _iter_nodelist(node.nodelist_empty, context)
+            return
+        if node.is_reversed:
+            values = reversed(values)
+        num_loopvars = len(node.loopvars)
+        unpack = num_loopvars > 1
+        loop_dict = context['forloop'] = {'parentloop': parentloop}
+        for i, item in enumerate(values):
+            loop_dict['counter0'] = i
+            loop_dict['counter'] = i + 1
+            loop_dict['revcounter'] = len_values - i
+            loop_dict['revcounter0'] = len_values - i - 1
+            loop_dict['first'] = i == 0
+            loop_dict['last'] = i == len_values - 1
+            if unpack:
+                try:
+                    len_item = len(item)
+                except TypeError:
+                    len_item = 1
+                if num_loopvars != len_item:
+                    raise ValueError("Need {0} values to unpack in for loop; got {1}. ".format(num_loopvars, len_item))
+                context.update(dict(zip(node.loopvars, item)))
+            else:
+                context[node.loopvars[0]] = item
+            yield from _iter_nodelist(node.nodelist_loop, context)
+            if unpack:
+                context.pop()
+
+
+class TemplateRenderer:
+    """
+    Renders django templates with one engine, keeping the most recently used templates compiled.
+    Example:
+        >>> renderer = TemplateRenderer(max_templates=2)
+        >>> renderer.render('{{x}}!', {'x': 5}), renderer.render('{{x}}!', {'x': 6})
+        ('5!', '6!')
+        >>> renderer.stats
+        TemplateCacheStats(hits=1, misses=1, evictions=0, size=1)
+    """
+    def __init__(self, engine=None, max_templates=256):
+        """
+        Input:
+            engine - Engine. The engine to compile the templates with (defaults to a new Engine()).
+            max_templates - int. The number of compiled templates to keep.
+        """
+        self.engine = engine if engine is not None else Engine()
+        self.max_templates = max_templates
+        self._templates = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    @property
+    def stats(self):
+        """TemplateCacheStats. The number of cache hits, misses and evictions, and the number of cached templates."""
+        with self._lock:
+            return TemplateCacheStats(self._hits, self._misses, self._evictions, len(self._templates))
+
+    def get_template(self, template_string):
+        """
+        Returns the compiled template, compiling it only if it isn't cached
+        Input:
+            template_string - str. The template source.
+        Output:
+            Template.
+        """
+        with self._lock:
+            template = self._templates.get(template_string)
+            if template is not None:
+                self._templates.move_to_end(template_string)
+                self._hits += 1
+                return template
+            self._misses += 1
+        # compiled outside the lock, so a slow template doesn't block renders of cached ones
+        template = self.engine.from_string(template_string)
+        with self._lock:
+            self._templates[template_string] = template
+            self._templates.move_to_end(template_string)
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+                self._evictions += 1
+        return template
+
+    def render(self, template_string, context_dictionary):
+        """
+        Renders a django template
+        Input:
+            template_string - str. The template to render.
+            context_dictionary - dict. The dictionary to use to render the template.
+        Output:
+            str. The template string rendered.
+        """
+        return self.get_template(template_string).render(Context(context_dictionary))
+
+    def render_stream(self, template_string, context_dictionary, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Renders a django template, yielding the output as it is rendered instead of building it whole
+        Input:
+            template_string - str. The template to render.
+            context_dictionary - dict. The dictionary to use to render the template.
+            chunk_size - int. The (minimal) number of characters in every yielded chunk but the last.
+        Output:
+            A generator of str chunks, which joined are the template string rendered.
+        """
+        template = self.get_template(template_string)
+        context = Context(context_dictionary)
+        pending, pending_size = [], 0
+        for output in _iter_template(template, context):
+            pending.append(output)
+            pending_size += len(output)
+            if pending_size >= chunk_size:
+                yield ''.join(pending)
+                pending, pending_size = [], 0
+        if pending:
+            yield ''.join(pending)
+
+    def render_to_file(self, template_string, context_dictionary, file, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Renders a django template into a file, as it is rendered
+        Input:
+            template_string - str. The template to render.
+            context_dictionary - dict. The dictionary to use to render the template.
+            file - file-like. A text file (or any object with a write method) to write into.
+            chunk_size - int. The (minimal) number of characters in every write but the last.
+        """
+        for chunk in self.render_stream(template_string, context_dictionary, chunk_size):
+            file.write(chunk)
+
+    def clear(self):
+        """Removes all the compiled templates (the stats are kept)"""
+        with self._lock:
+            self._templates.clear()
+
+
+_default_renderer = TemplateRenderer()
+
+
+# the template a worker process of BulkRenderer renders
+_worker_template = None
+
+
+def _init_worker(template_string):
+    global _worker_template
+    _worker_template = _default_renderer.get_template(template_string)
+
+
+def _render_chunk(context_dictionaries):
+    return [_worker_template.render(Context(context_dictionary)) for context_dictionary in context_dictionaries]
+
+
+class BulkRenderer:
+    """
+    Renders one template against many context dictionaries, in a pool of processes.
+    The template is compiled once per process, and the contexts are sent to the processes in chunks.
+    Example:
+        >>> renderer = BulkRenderer('{{x}};', processes=2)
+        >>> list(renderer.render({'x': x} for x in range(5)))
+        ['0;', '1;', '2;', '3;', '4;']
+        >>> renderer.stats.renders
+        5
+    """
+    def __init__(self, template_string, processes=None, chunk_size=256):
+        """
+        Input:
+            template_string - str. The template to render.
+            processes - int. The number of processes to use (defaults to the number of CPUs).
+            chunk_size - int. The number of contexts sent to a process at once.
+        """
+        self.template_string = template_string
+        self.processes = processes
+        self.chunk_size = chunk_size
+        # fails early on syntax errors, instead of in every process
+        _default_renderer.get_template(template_string)
+        self._renders = 0
+        self._seconds = 0.0
+
+    @property
+    def stats(self):
+        """RenderStats. The number of renders done so far, the time they took and their throughput."""
+        return RenderStats(self._renders, self._seconds, self._renders / self._seconds if self._seconds else 0.0)
+
+    def render_chunks(self, context_dictionaries):
+        """
+        Renders the template against every context dictionary
+        Input:
+            context_dictionaries - iterable of dicts (which are pickled to the processes). Consumed lazily.
+        Output:
+            A generator of lists of rendered strings, in the order of the contexts.
+        """
+        contexts = iter(context_dictionaries)
+        chunks = iter(lambda: list(itertools.islice(contexts, self.chunk_size)), [])
+        processes = self.processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(self.template_string,)) as executor:
+            # a bounded number of chunks is in flight, so the contexts and renders aren't all held in memory
+            max_pending = 2 * processes
+            pending = collections.deque()
+            start = time.perf_counter()
+            try:
+                for chunk in itertools.chain(chunks, [None]):
+                    if chunk is not None:
+                        pending.append(executor.submit(_render_chunk, chunk))
+                    while pending and (len(pending) >= max_pending or chunk is None):
+                        rendered = pending.popleft().result()
+                        self._renders += len(rendered)
+                        self._seconds += time.perf_counter() - start
+                        yield rendered
+                        start = time.perf_counter()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def render(self, context_dictionaries):
+        """
+        Renders the template against every context dictionary
+        Input:
+            context_dictionaries - iterable of dicts. Consumed lazily.
+        Output:
+            A generator of the rendered strings, in the order of the contexts.
+        """
+        for rendered in self.render_chunks(context_dictionaries):
+            yield from rendered
+
+    def render_to_file(self, context_dictionaries, file, separator=''):
+        """
+        Renders the template against every context dictionary, writing the renders to a file
+        Input:
+            context_dictionaries - iterable of dicts. Consumed lazily.
+            file - str or file-like. The path of the file, or a text file to write into.
+            separator - str. Written after every render.
+        Output:
+            RenderStats. The stats of this run.
+        """
+        if isinstance(file, str):
+            with open(file, 'w') as f:
+                return self.render_to_file(context_dictionaries, f, separator)
+        renders, seconds = self._renders, self._seconds
+        for rendered in self.render_chunks(context_dictionaries):
+            file.writelines(render + separator for render in rendered)
+        renders, seconds = self._renders - renders, self._seconds - seconds
+        return RenderStats(renders, seconds, renders / seconds if seconds else 0.0)
+
 
 def render_template(template_string, context_dictionary):
     """
@@ -18,10 +415,24 @@ def render_template(template_string, context_dictionary):
         >>> render_template('{% if x %}{{x}}{% else %}x is falsey{% endif %}', {'x': 0})
         'x is falsey'
     """
-    engine = Engine()
-    template = Template(template_string)
-    ctx = Context(context_dictionary)
-    return template.render(ctx)
+    return _default_renderer.render(template_string, context_dictionary)
+
+
+def stream_template(template_string, context_dictionary, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Renders a django template in chunks, so the whole output is never held in memory
+    (for, if, with, autoescape, block and extends tags are rendered node by node, any other tag is rendered whole)
+    Input:
+        template_string - str. The template to render.
+        context_dictionary - dict. The dictionary to use to render the template.
+        chunk_size - int. The (minimal) number of characters in every chunk but the last.
+    Output:
+        A generator of str chunks, which joined are the template string rendered.
+    Example:
+        >>> list(stream_template('{% for x in xs %}{{x}},{% endfor %}', {'xs': range(6)}, chunk_size=4))
+        ['0,1,', '2,3,', '4,5,']
+    """
+    return _default_renderer.render_stream(template_string, context_dictionary, chunk_size)
 
 
 if __name__ == "__main__":
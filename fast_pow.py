@@ -1,3 +1,9 @@
+import operator
+import collections
+
+import numpy as np
+
+
 python_pow = pow
 
 
@@ -31,17 +37,286 @@ def fast_iter_pow(x, n):
 
 
 def slow_recursive_pow(x, n):
-    if n:
-        return x * slow_recursive_pow(x, n-1)
-    else:
-        return 1
+    """
+    x^n = x * x^(n-1), with the recursion unrolled into a loop (so large n don't exhaust the stack):
+    x * (x * (... * (x * 1)))
+    """
+    res = 1
+    for _ in range(n):
+        res = x * res
+    return res
 
 
 def fast_recursive_pow(x, n):
-    if n:
+    """
+    x^n = x^(n-1) * x if n is odd, (x*x)^(n/2) otherwise,
+    with the recursion unrolled into a loop: the right-hand factors of the odd steps are kept on a stack,
+    and multiplied in the same order the recursion would have once n reaches 0.
+    n is halved with integer division, so it stays exact for any n
+    """
+    pending = []
+    while n:
         if n % 2:
-            return fast_recursive_pow(x, n - 1) * x
+            pending.append(x)
+            n -= 1
+        else:
+            x = x * x
+            n //= 2
+    res = 1
+    for element in reversed(pending):
+        res = res * element
+    return res
+
+
+def monoid_pow(x, n, mul=operator.mul, identity=1):
+    """
+    fast_iter_pow for any associative mul (matrices, polynomials mod a modulus, modular ints, ...)
+    identity is only used when n == 0, so the first multiplication by it is skipped
+    """
+    if n < 0:
+        raise ValueError("exponents must be non-negative")
+    res = None
+    element = x
+    while n > 0:
+        n, m = divmod(n, 2)
+        if m:
+            res = element if res is None else mul(res, element)
+        if n:
+            element = mul(element, element)
+    return identity if res is None else res
+
+
+def kary_pow(x, n, mul=operator.mul, identity=1, k=4):
+    """
+    reads n in base 2^k, from its most significant digit:
+    x^n = (...((x^d0)^(2^k) * x^d1)^(2^k) * ...) * x^dm
+    with x^0 ... x^(2^k - 1) precomputed, every k squarings cost at most one more multiplication
+    """
+    if n < 0:
+        raise ValueError("exponents must be non-negative")
+    if n == 0:
+        return identity
+    table = [None, x]
+    for _ in range(2 ** k - 2):
+        table.append(mul(table[-1], x))
+    digits = []
+    while n > 0:
+        n, digit = divmod(n, 2 ** k)
+        digits.append(digit)
+    res = None
+    for digit in reversed(digits):
+        if res is not None:
+            for _ in range(k):
+                res = mul(res, res)
+        if digit:
+            res = table[digit] if res is None else mul(res, table[digit])
+    return res
+
+
+def sliding_window_pow(x, n, mul=operator.mul, identity=1, window=4):
+    """
+    like kary_pow, but windows (of up to window bits) always start and end with a 1 bit,
+    so only the odd powers x^1, x^3, ..., x^(2^window - 1) need to be precomputed,
+    and runs of 0 bits cost only squarings
+    """
+    if n < 0:
+        raise ValueError("exponents must be non-negative")
+    if n == 0:
+        return identity
+    table = {1: x}
+    if window > 1:
+        square = mul(x, x)
+        for power in range(3, 2 ** window, 2):
+            table[power] = mul(table[power - 2], square)
+    bits = bin(n)[2:]
+    res = None
+    i = 0
+    while i < len(bits):
+        if bits[i] == '0':
+            res = mul(res, res)
+            i += 1
+            continue
+        end = min(i + window, len(bits))
+        while bits[end - 1] == '0':
+            end -= 1
+        if res is not None:
+            for _ in range(end - i):
+                res = mul(res, res)
+        value = table[int(bits[i:end], 2)]
+        res = value if res is None else mul(res, value)
+        i = end
+    return res
+
+
+def mod_pow(x, n, mod):
+    """
+    the fast path for modular ints: python's pow does the modular reduction in C
+    """
+    return python_pow(x, n, mod)
+
+
+def matrix_pow(m, n, mod=None):
+    """
+    the fast path for square numpy matrices, optionally reduced modulo mod after every product
+    (in python ints if mod is too large for the products to fit in int64)
+    """
+    m = np.asarray(m)
+    if mod is None:
+        return np.linalg.matrix_power(m, n)
+    if m.dtype != object and (mod - 1) ** 2 * m.shape[0] >= 2 ** 63:
+        m = m.astype(object)
+    identity = np.identity(m.shape[0], dtype=m.dtype)
+    return monoid_pow(m % mod, n, lambda a, b: np.dot(a, b) % mod, identity % mod)
+
+
+def poly_mulmod(modulus, p=None):
+    """
+    returns a mul function of polynomials modulo a monic polynomial (and their coefficients modulo p),
+    with polynomials as lists of coefficients, lowest degree first
+    e.g. x^n mod the characteristic polynomial of a linear recurrence gives its n-th term
+    """
+    if modulus[-1] != 1:
+        raise ValueError("modulus must be monic")
+    degree = len(modulus) - 1
+
+    def mul(a, b):
+        res = [0] * max(len(a) + len(b) - 1, 0)
+        for i, ai in enumerate(a):
+            if ai:
+                for j, bj in enumerate(b):
+                    res[i + j] += ai * bj
+        for i in range(len(res) - 1, degree - 1, -1):
+            coefficient = res[i]
+            if coefficient:
+                for j in range(degree):
+                    res[i - degree + j] -= coefficient * modulus[j]
+        res = res[:degree]
+        if p is not None:
+            res = [coefficient % p for coefficient in res]
+        return res
+
+    return mul
+
+
+def vectorized_pow(x, n, mod=None):
+    """
+    fast_iter_pow over numpy arrays of bases and exponents (broadcast together):
+    every step handles the same bit of all the exponents at once, updating only the elements whose bit is set,
+    so the cost is O(max bit length) vectorized steps instead of a python loop per element.
+    with mod, products are reduced modulo mod (in python ints if they might not fit in int64).
+    integer bases are computed in int64 (or python ints for uint64), not in their own narrower type
+    """
+    x, n = np.broadcast_arrays(np.asarray(x), np.asarray(n))
+    if np.any(n < 0):
+        raise ValueError("exponents must be non-negative")
+    n = n.copy()
+    if x.dtype.kind in 'biu':
+        x = x.astype(np.int64 if np.can_cast(x.dtype, np.int64) else object)
+    if mod is not None and x.dtype != object and (mod - 1) ** 2 >= 2 ** 63:
+        x = x.astype(object)
+    element = x.copy() if mod is None else x % mod
+    res = np.ones_like(element)
+    if mod is not None:
+        res %= mod
+    while True:
+        remaining = n > 0
+        if not remaining.any():
+            return res
+        odd = (n & 1).astype(bool)
+        np.multiply(res, element, out=res, where=odd)
+        n >>= 1
+        remaining = n > 0
+        np.multiply(element, element, out=element, where=remaining)
+        if mod is not None:
+            np.remainder(res, mod, out=res, where=odd)
+            np.remainder(element, mod, out=element, where=remaining)
+
+
+class FixedBasePow:
+    """
+    x^n for a fixed x and many n.
+    the table x^(d * 2^(window*i)) (for every digit d of n in base 2^window) is computed once,
+    and extended only when a larger exponent comes, so every exponentiation costs one multiplication
+    per non-zero digit of n, and no squarings.
+    with window=1 the table is just x^1, x^2, x^4, x^8, ...
+    with max_size, the table stops growing at that many powers (but always keeps its first row),
+    and the digits of n beyond it are raised with squarings
+    """
+    def __init__(self, x, mul=operator.mul, identity=1, window=1, max_size=None):
+        self.mul = mul
+        self.identity = identity
+        self.window = window
+        self.max_rows = None if max_size is None else max(max_size // (2 ** window - 1), 1)
+        self.table = [[x]]
+        for _ in range(2 ** window - 2):
+            self.table[0].append(mul(self.table[0][-1], x))
+
+    @property
+    def size(self):
+        """the number of powers in the table"""
+        return len(self.table) * len(self.table[0])
+
+    def _next_row_element(self):
+        last = self.table[-1]
+        # x^(2^(window*(i+1))) = x^((2^window - 1) * 2^(window*i)) * x^(2^(window*i))
+        return self.mul(last[-1], last[0]) if len(last) > 1 else self.mul(last[0], last[0])
+
+    def _extend(self, num_digits):
+        if self.max_rows is not None:
+            num_digits = min(num_digits, self.max_rows)
+        while len(self.table) < num_digits:
+            element = self._next_row_element()
+            row = [element]
+            for _ in range(2 ** self.window - 2):
+                row.append(self.mul(row[-1], element))
+            self.table.append(row)
+
+    def __call__(self, n):
+        self._extend((n.bit_length() + self.window - 1) // self.window)
+        res = None
+        for row in self.table:
+            if not n:
+                break
+            n, digit = divmod(n, 2 ** self.window)
+            if digit:
+                res = row[digit - 1] if res is None else self.mul(res, row[digit - 1])
+        if n:
+            # the digits beyond a full table: x^(n * 2^(window*len(table)))
+            high = monoid_pow(self._next_row_element(), n, self.mul, self.identity)
+            res = high if res is None else self.mul(res, high)
+        return self.identity if res is None else res
+
+
+class FixedBaseCache:
+    """
+    FixedBasePow tables for many bases, holding at most max_powers powers in total:
+    the least recently used bases are evicted to make room for new ones,
+    and a single table stops growing at max_powers.
+    bases must be hashable
+    """
+    def __init__(self, max_powers=4096, mul=operator.mul, identity=1, window=1):
+        self.max_powers = max_powers
+        self.mul = mul
+        self.identity = identity
+        self.window = window
+        self.tables = collections.OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def pow(self, x, n):
+        table = self.tables.get(x)
+        if table is None:
+            self.misses += 1
+            table = self.tables[x] = FixedBasePow(x, self.mul, self.identity, self.window, self.max_powers)
+            self.size += table.size
         else:
-            return fast_recursive_pow(x * x, n / 2)
-    else:
-        return 1
\ No newline at end of file
+            self.hits += 1
+            self.tables.move_to_end(x)
+        size = table.size
+        res = table(n)
+        self.size += table.size - size
+        while self.size > self.max_powers and len(self.tables) > 1:
+            _, evicted = self.tables.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+        return res
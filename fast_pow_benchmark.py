@@ -0,0 +1,133 @@
+"""
+Compares the pow variants of fast_pow (and python's pow) on int, float, big-int and matrix operands,
+reporting the number of multiplications each one performed and its wall time.
+
+    python fast_pow_benchmark.py --exponents 10 100 1000 10000 --output results.json
+"""
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+import fast_pow
+
+
+VARIANTS = {
+    'python_pow': fast_pow.python_pow,
+    'slow_iter_pow': fast_pow.slow_iter_pow,
+    'fast_iter_pow': fast_pow.fast_iter_pow,
+    'slow_recursive_pow': fast_pow.slow_recursive_pow,
+    'fast_recursive_pow': fast_pow.fast_recursive_pow,
+    'sliding_window_pow': fast_pow.sliding_window_pow,
+}
+# variants that do n multiplications, which are skipped for exponents above --max-slow-exponent
+SLOW_VARIANTS = {'slow_iter_pow', 'slow_recursive_pow'}
+
+
+class Matrix:
+    """
+    A numpy matrix where * is the matrix product (and 1 * m is m), so the pow variants work on it
+    """
+    def __init__(self, array):
+        self.array = np.asarray(array)
+
+    def __mul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(self.array @ other.array)
+        return Matrix(self.array * other)
+
+    __rmul__ = __mul__
+
+    def __pow__(self, n):
+        return Matrix(np.linalg.matrix_power(self.array, n))
+
+
+class Counted:
+    """
+    Wraps an operand, counting the multiplications done on it
+    """
+    def __init__(self, value, counter):
+        self.value = value
+        self.counter = counter
+
+    def __mul__(self, other):
+        self.counter[0] += 1
+        return Counted(self.value * (other.value if isinstance(other, Counted) else other), self.counter)
+
+    def __rmul__(self, other):
+        self.counter[0] += 1
+        return Counted(other * self.value, self.counter)
+
+
+OPERANDS = {
+    'int': lambda: 3,
+    'float': lambda: 1.0000001,
+    'big_int': lambda: 3 ** 100,
+    # a rotation, so its powers neither overflow nor vanish
+    'matrix': lambda: Matrix([[0.6, -0.8], [0.8, 0.6]]),
+}
+
+
+def count_multiplications(func, x, n):
+    """
+    :return: the number of multiplications func does to compute x^n (None for python's pow, which can't be traced)
+    """
+    if func is fast_pow.python_pow:
+        return None
+    counter = [0]
+    func(Counted(x, counter), n)
+    return counter[0]
+
+
+def time_pow(func, x, n, repeat=3):
+    """
+    :return: the best wall time of computing x^n with func
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(x, n)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(operands, exponents, variants=None, repeat=3, max_slow_exponent=1000):
+    """
+    :return: a list of results, one per operand, exponent and variant
+    """
+    results = []
+    for operand in operands:
+        x = OPERANDS[operand]()
+        for n in exponents:
+            for name, func in (variants or VARIANTS).items():
+                if name in SLOW_VARIANTS and n > max_slow_exponent:
+                    continue
+                results.append(dict(operand=operand, exponent=n, variant=name,
+                                    multiplications=count_multiplications(func, x, n),
+                                    seconds=time_pow(func, x, n, repeat)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operands', nargs='+', choices=sorted(OPERANDS), default=sorted(OPERANDS))
+    parser.add_argument('--exponents', nargs='+', type=lambda n: int(float(n)), default=[10, 100, 1000, 10000])
+    parser.add_argument('--variants', nargs='+', choices=sorted(VARIANTS), default=list(VARIANTS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-slow-exponent', type=lambda n: int(float(n)), default=1000)
+    parser.add_argument('--output', help="where to also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    variants = {name: VARIANTS[name] for name in args.variants}
+    results = run(args.operands, args.exponents, variants, args.repeat, args.max_slow_exponent)
+    for result in results:
+        print('{operand:>8} {exponent:>8} {variant:>20} {multiplications!s:>8} {seconds:12.6f}s'.format(**result))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
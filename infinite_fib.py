@@ -1,5 +1,10 @@
 from operator import add
 import itertools
+import functools
+import threading
+import collections
+
+import numpy as np
 
 
 def itertive_infinite_fib():
@@ -11,10 +16,20 @@ def itertive_infinite_fib():
         yield b
 
 
+def itertive_infinite_fib_mod(m):
+    """the fibonacci sequence modulo m"""
+    a, b = 0, 1 % m
+    while True:
+        yield a
+        a, b = b, (a + b) % m
+
+
 def tail(gen):
     """returns all the elements in the generator excluding first element"""
-    next(gen)
-    return gen
+    # lazily, so a stream can be defined in terms of its own tail
+    gen = iter(gen)
+    next(gen, None)
+    yield from gen
 
 
 def zip_with(func, elems1, elems2):
@@ -23,8 +38,209 @@ def zip_with(func, elems1, elems2):
         yield func(elem1, elem2)
 
 
+class Stream:
+    """
+    a lazily evaluated stream that may be defined in terms of itself.
+    all its iterators share one buffer of the last `lookback` elements,
+    so an iterator may lag behind the newest element by at most `lookback` elements
+    """
+    def __init__(self, lookback):
+        self.lookback = lookback
+        self._elems = collections.deque(maxlen=lookback)
+        # the number of elements evaluated so far
+        self._end = 0
+        self._definition = None
+
+    def define(self, elems):
+        """sets the elements of the stream (an iterable that may iterate the stream itself)"""
+        self._definition = iter(elems)
+
+    def __iter__(self):
+        return _StreamIterator(self)
+
+    def _get(self, i):
+        if i == self._end:
+            if self._definition is None:
+                raise RuntimeError("stream is not defined yet")
+            # raises StopIteration for finite streams
+            self._elems.append(next(self._definition))
+            self._end += 1
+        start = self._end - len(self._elems)
+        if i < start:
+            raise IndexError("element {i} is out of the lookback of the stream".format(i=i))
+        return self._elems[i - start]
+
+
+class _StreamIterator:
+    def __init__(self, stream):
+        self._stream = stream
+        self._index = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        elem = self._stream._get(self._index)
+        self._index += 1
+        return elem
+
+
+class LazyList(Stream):
+    """
+    a memoized lazy sequence: every element is evaluated once, when it is first needed,
+    and shared by all the iterators, slices and derived lists of the list.
+    only the last `retention` evaluated elements are kept (all of them if retention is None).
+    it may be shared across threads, but each thread should use its own iterators.
+    a list and the lists derived from it share one lock, so lists defined in terms of each other can't deadlock
+    """
+    def __init__(self, elems=None, retention=None, lock=None):
+        super().__init__(lookback=retention)
+        self._lock = lock if lock is not None else threading.RLock()
+        if elems is not None:
+            self.define(elems)
+
+    @property
+    def retention(self):
+        return self.lookback
+
+    def _get(self, i):
+        # reentrant, for lists defined in terms of themselves
+        with self._lock:
+            while self._end < i:
+                super()._get(self._end)
+            return super()._get(i)
+
+    def _iter_from(self, start):
+        it = _StreamIterator(self)
+        it._index = start
+        return it
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.start or 0, index.stop, index.step or 1
+            if start < 0 or (stop is not None and stop < 0) or step < 0:
+                raise ValueError("negative slice bounds are not supported")
+            return LazyList(itertools.islice(self._iter_from(start), 0, None if stop is None else max(stop - start, 0),
+                                             step), self.retention, self._lock)
+        if index < 0:
+            raise IndexError("negative indices are not supported")
+        try:
+            return self._get(index)
+        except StopIteration:
+            raise IndexError("list index out of range") from None
+
+    def tail(self):
+        """returns the list without its first element"""
+        return self[1:]
+
+    def map(self, func):
+        """returns the list of func applied on every element"""
+        return LazyList(map(func, self), self.retention, self._lock)
+
+    def zip_with(self, func, other):
+        """returns the list of func applied on pairs of elements from this list and other"""
+        return LazyList(zip_with(func, self, other), self.retention, self._lock)
+
+    def take(self, n):
+        """returns a list of the first n elements (or all of them, if there are fewer)"""
+        return list(itertools.islice(self, n))
+
+
 def recursive_infinite_fib():
-    yield 0
-    yield 1
-    f1, f2 = itertools.tee(recursive_infinite_fib(), 2)
-    yield from zip_with(add, f1, tail(f2))
+    f = Stream(lookback=2)
+    f.define(itertools.chain([0, 1], zip_with(add, f, tail(f))))
+    return iter(f)
+
+
+def _fib_pair(n):
+    """returns (F(n), F(n+1)) using fast doubling"""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k)(2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2
+        a, b = a * (2 * b - a), a * a + b * b
+        if bit == '1':
+            a, b = b, a + b
+    return a, b
+
+
+def fib(n):
+    """returns the n-th fibonacci number in O(log n) multiplications"""
+    if n < 0:
+        raise ValueError("n({n}) must be non-negative".format(n=n))
+    return _fib_pair(n)[0]
+
+
+def fib_range(a, b):
+    """yields the fibonacci numbers F(a) up to (excluding) F(b)"""
+    if a < 0:
+        raise ValueError("a({a}) must be non-negative".format(a=a))
+    x, y = _fib_pair(a)
+    for _ in range(a, b):
+        yield x
+        x, y = y, x + y
+
+
+# moduli whose pisano period is longer than this are answered by fast doubling instead of a table
+MAX_TABLE_PERIOD = 2 ** 20
+
+
+def pisano_period(m, max_period=None):
+    """
+    returns the period of the fibonacci sequence modulo m,
+    or None if it is longer than max_period
+    """
+    fibs = itertive_infinite_fib_mod(m)
+    first = next(fibs)
+    start = (first, next(fibs))
+    prev = start[1]
+    for i, elem in enumerate(fibs, 1):
+        if (prev, elem) == start:
+            return i
+        if max_period is not None and i >= max_period:
+            return None
+        prev = elem
+
+
+@functools.lru_cache(maxsize=16)
+def _pisano_table(m):
+    """returns the fibonacci numbers modulo m over one pisano period, or None if the period is too long"""
+    period = pisano_period(m, MAX_TABLE_PERIOD)
+    if period is None:
+        return None
+    dtype = np.int64 if m <= np.iinfo(np.int64).max else object
+    return np.fromiter(itertools.islice(itertive_infinite_fib_mod(m), period), dtype=dtype, count=period)
+
+
+def _fib_mod_doubling(n, m):
+    """fast doubling modulo m over an array of indices, one bit of all the indices at a time"""
+    # int64 can hold the products of two residues only below 2^31
+    dtype = np.int64 if m < 2 ** 31 else object
+    a = np.zeros(n.shape, dtype=dtype)
+    b = np.full(n.shape, 1 % m, dtype=dtype)
+    num_bits = int(n.max()).bit_length() if n.size else 0
+    for shift in reversed(range(num_bits)):
+        a, b = a * (2 * b - a) % m, (a * a + b * b) % m
+        bit = ((n >> shift) & 1).astype(bool)
+        a, b = np.where(bit, b, a), np.where(bit, (a + b) % m, b)
+    return a
+
+
+def fib_mod(n, m):
+    """
+    returns F(n) modulo m, for an index or an array of indices.
+    the fibonacci numbers over the pisano period of m are cached,
+    unless the period is long, in which case fast doubling is used
+    """
+    if m < 1:
+        raise ValueError("m({m}) must be positive".format(m=m))
+    n = np.asarray(n)
+    if n.dtype != object and not np.issubdtype(n.dtype, np.integer):
+        raise TypeError("n must be an integer or an array of integers")
+    if n.size and n.min() < 0:
+        raise ValueError("n must be non-negative")
+    table = _pisano_table(m)
+    if table is not None:
+        result = table[np.asarray(n % len(table), dtype=np.int64)]
+    else:
+        result = _fib_mod_doubling(n, m)
+    return result.item() if result.ndim == 0 else result
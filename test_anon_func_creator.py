@@ -1,7 +1,11 @@
 import unittest
 import math
 import timeit
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+
+import anon_func_creator
 from anon_func_creator import create_func
 
 
@@ -62,3 +66,179 @@ class TestCreateFunc(unittest.TestCase):
 
         func2 = create_func(string)
         self.assertLess(timeit.timeit(func2, number=100), timeit.timeit(func, number=100))
+
+    def test_underscore_and_numbered_args(self):
+        func = create_func("_ * 10 + _2")
+        self.assertEqual(func(3, 4), 34)
+
+    def test_underscore_in_names_is_not_an_arg(self):
+        my_var = 3
+        func = create_func("my_var + 1")
+        self.assertEqual(func(), 4)
+
+    def test_nested_lambda(self):
+        func = create_func("list(map(lambda x: x * _1, _2))")
+        self.assertEqual(func(2, [1, 2, 3]), [2, 4, 6])
+
+    def test_is_a_real_function(self):
+        func = create_func("_1 + _2")
+        self.assertEqual(func._func.__code__.co_argcount, 2)
+
+    def test_compiled_once(self):
+        anon_func_creator._compile_factory.cache_clear()
+        for i in range(3):
+            func = create_func("_1 * i")
+            self.assertEqual(func(2), 2 * i)
+        info = anon_func_creator._compile_factory.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+        for i in range(anon_func_creator.CACHE_SIZE + 10):
+            create_func("_1 * {0}".format(i))
+        for cache in [anon_func_creator._compile_factory, anon_func_creator._expression_names]:
+            self.assertEqual(cache.cache_info().currsize, anon_func_creator.CACHE_SIZE)
+
+
+class TestOverArrays(unittest.TestCase):
+    def setUp(self):
+        self.x = np.linspace(-3, 3, 13)
+        self.y = np.linspace(1, 5, 13)
+
+    def assert_over_arrays(self, func, columns, path):
+        actual = func.over_arrays(*columns)
+        expected = [func(*row) for row in zip(*columns)]
+        self.assertEqual(actual.path, path)
+        np.testing.assert_allclose(actual.values, expected)
+
+    def test_arithmetic(self):
+        self.assert_over_arrays(create_func("2*_1 + _2**2 - _1 / _2"), [self.x, self.y], anon_func_creator.VECTORIZED)
+
+    def test_math_functions(self):
+        func = create_func("math.sqrt(_2) + abs(math.sin(_1)) + max(_1, _2)")
+        self.assert_over_arrays(func, [self.x, self.y], anon_func_creator.VECTORIZED)
+
+    def test_comparisons_and_conditions(self):
+        func = create_func("(_1 if -1 < _1 <= 2 and not _2 > 4 else -_2)")
+        self.assert_over_arrays(func, [self.x, self.y], anon_func_creator.VECTORIZED)
+
+    def test_scope(self):
+        factor = 3
+        self.assert_over_arrays(create_func("_1 * factor"), [self.x], anon_func_creator.VECTORIZED)
+
+    def test_broadcasting(self):
+        actual = create_func("_1 + _2").over_arrays(self.x, 1)
+        self.assertEqual(actual.path, anon_func_creator.VECTORIZED)
+        np.testing.assert_allclose(actual.values, self.x + 1)
+
+    def test_constant(self):
+        actual = create_func("_1 * 0 + 5 if False else 5").over_arrays(self.x)
+        np.testing.assert_allclose(actual.values, np.full(len(self.x), 5))
+
+    def test_per_element(self):
+        for string in ["math.log(_2, 2) + _1", "min(_1, _2, 0)", "[_1, _2][0]", "_1 + _2 + len('ab')"]:
+            with self.subTest(string=string):
+                self.assert_over_arrays(create_func(string), [self.x, self.y], anon_func_creator.PER_ELEMENT)
+
+    def test_per_element_strings(self):
+        actual = create_func("str(_1)").over_arrays([1, 2])
+        self.assertEqual(actual.path, anon_func_creator.PER_ELEMENT)
+        self.assertEqual(actual.values.tolist(), ['1', '2'])
+
+    def test_vectorized_error_falls_back(self):
+        # int arrays can't be raised to negative powers, unlike ints
+        actual = create_func("_1 ** _2").over_arrays(np.array([2, 4]), np.array([-1, 2]))
+        self.assertEqual(actual.path, anon_func_creator.PER_ELEMENT)
+        np.testing.assert_allclose(actual.values, [0.5, 16])
+
+    def test_boolean_operators_values(self):
+        # and/or return one of their operands, not a boolean
+        a, b = np.array([0, 3, 0, -2]), np.array([5, 6, 0, 0])
+        for string in ["_1 or _2", "_1 and _2", "_1 and _2 or 7", "_1 or _2 and 7"]:
+            with self.subTest(string=string):
+                self.assert_over_arrays(create_func(string), [a, b], anon_func_creator.VECTORIZED)
+        self.assertEqual(create_func("_1 or _2").over_arrays([0, 3], [5, 6]).values.tolist(), [5, 3])
+
+    def test_integer_overflow_falls_back(self):
+        for string in ["2 ** _1", "1 << _1", "_1 * 10 ** 18"]:
+            with self.subTest(string=string):
+                actual = create_func(string).over_arrays(np.array([3, 70]))
+                self.assertEqual(actual.path, anon_func_creator.PER_ELEMENT)
+                self.assertEqual(actual.values.tolist(), [create_func(string)(3), create_func(string)(70)])
+        self.assertEqual(create_func("2 ** _1").over_arrays(np.array([3, 10])).path, anon_func_creator.VECTORIZED)
+
+    def test_integer_functions(self):
+        for string in ["round(_1)", "math.floor(_1)", "math.ceil(_1)", "math.trunc(_1)"]:
+            with self.subTest(string=string):
+                actual = create_func(string).over_arrays(self.x + 0.25)
+                self.assertEqual(actual.path, anon_func_creator.VECTORIZED)
+                self.assertTrue(np.issubdtype(actual.values.dtype, np.integer))
+                self.assertEqual(actual.values.tolist(), [create_func(string)(value) for value in self.x + 0.25])
+        self.assertEqual(create_func("round(_1, 1)").over_arrays(self.x).values.dtype, np.float64)
+        self.assertRaises(OverflowError, create_func("math.floor(_1)").over_arrays, np.array([1.5, np.inf]))
+        self.assertRaises(ValueError, create_func("round(_1)").over_arrays, np.array([1.5, np.nan]))
+
+    def test_negation_overflow_falls_back(self):
+        actual = create_func("-_1").over_arrays(np.array([-2 ** 63, 0]))
+        self.assertEqual(actual.path, anon_func_creator.PER_ELEMENT)
+        self.assertEqual(actual.values.tolist(), [2 ** 63, 0])
+        self.assertEqual(create_func("-_1").over_arrays(np.array([3, -4])).values.tolist(), [-3, 4])
+
+    def test_right_shift(self):
+        actual = create_func("_1 >> _2").over_arrays(np.array([8, -4]), np.array([1, 100]))
+        self.assertEqual(actual.path, anon_func_creator.VECTORIZED)
+        self.assertEqual(actual.values.tolist(), [4, -1])
+        self.assertRaises(ValueError, create_func("_1 >> _2").over_arrays, np.array([1, 4]), np.array([1, -1]))
+
+    def test_constant_attributes(self):
+        self.assert_over_arrays(create_func("_1 * math.pi + math.e"), [self.x], anon_func_creator.VECTORIZED)
+        self.assert_over_arrays(create_func("_1.real"), [self.x], anon_func_creator.PER_ELEMENT)
+
+    def test_division_by_zero_raises(self):
+        for string in ["_1 // 0", "_1 % 0", "_1 / 0"]:
+            with self.subTest(string=string):
+                self.assertRaises(ZeroDivisionError, create_func(string).over_arrays, np.array([3, 7]))
+
+
+class TestBinding(unittest.TestCase):
+    def test_snapshot(self):
+        x = 1
+        func = create_func("_1 + x")
+        x = 10
+        self.assertEqual(func(1), 2)
+        self.assertEqual(x, 10)
+
+    def test_live(self):
+        x = 1
+        func = create_func("_1 + x", binding=anon_func_creator.LIVE)
+        self.assertEqual(func(1), 2)
+        x = 10
+        self.assertEqual(func(1), 11)
+        self.assertEqual(func.over_arrays(np.arange(3)).values.tolist(), [10, 11, 12])
+
+    def test_live_bound_later(self):
+        func = create_func("_1 + y", binding=anon_func_creator.LIVE)
+        self.assertRaises(NameError, func, 1)
+        y = 5
+        self.assertEqual(func(1), 6)
+
+    def test_live_closure(self):
+        z = 2
+
+        def make():
+            # only the variables of the immediate caller are seen, so it has to close over z
+            z
+            return create_func("_1 * z", binding=anon_func_creator.LIVE)
+
+        func = make()
+        z = 3
+        self.assertEqual(func(2), 6)
+
+    def test_invalid_binding(self):
+        self.assertRaises(ValueError, create_func, "_1", binding="late")
+
+    def test_threads(self):
+        offset = 1000
+        for binding in [anon_func_creator.SNAPSHOT, anon_func_creator.LIVE]:
+            with self.subTest(binding=binding):
+                func = create_func("_1 * 2 + _2 + offset", binding=binding)
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    actual = list(executor.map(func, range(10000), range(10000)))
+                self.assertEqual(actual, [3 * i + offset for i in range(10000)])
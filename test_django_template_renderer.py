@@ -1,5 +1,10 @@
+import io
+import os
+import tempfile
 import unittest
-from django_template_renderer import render_template
+import tracemalloc
+from django.template import Engine
+from django_template_renderer import render_template, stream_template, TemplateRenderer, BulkRenderer
 from datetime import datetime
 
 
@@ -19,3 +24,186 @@ class TestRenderTemplate(unittest.TestCase):
         actual = render_template('{%for x in xs%}{{x}}{%endfor%}', {'xs': range(5)})
         self.assertEqual(actual, expected)
 
+
+class TestTemplateRenderer(unittest.TestCase):
+    def test_render(self):
+        renderer = TemplateRenderer()
+        self.assertEqual(renderer.render('{{a}}-{{b}}', {'a': 1, 'b': 2}), '1-2')
+        self.assertEqual(renderer.render('{{a}}-{{b}}', {'a': 3, 'b': 4}), '3-4')
+
+    def test_stats(self):
+        renderer = TemplateRenderer(max_templates=2)
+        for template_string in ['{{a}}', '{{b}}', '{{a}}', '{{c}}', '{{b}}']:
+            renderer.render(template_string, {'a': 1, 'b': 2, 'c': 3})
+        # {{b}} is evicted by {{c}}, being the least recently used
+        self.assertEqual(tuple(renderer.stats), (1, 4, 2, 2))
+
+    def test_compiled_once(self):
+        renderer = TemplateRenderer()
+        self.assertIs(renderer.get_template('{{a}}'), renderer.get_template('{{a}}'))
+
+    def test_clear(self):
+        renderer = TemplateRenderer()
+        renderer.render('{{a}}', {'a': 1})
+        renderer.clear()
+        renderer.render('{{a}}', {'a': 1})
+        self.assertEqual(renderer.stats.misses, 2)
+        self.assertEqual(renderer.stats.size, 1)
+
+
+class TestBulkRenderer(unittest.TestCase):
+    template_string = '{% for x in xs %}{{x}}{% endfor %}-{{name}}'
+
+    def contexts(self, n):
+        return ({'xs': range(i % 5), 'name': 'n{0}'.format(i)} for i in range(n))
+
+    def expected(self, n):
+        return [render_template(self.template_string, context) for context in self.contexts(n)]
+
+    def test_ordered(self):
+        renderer = BulkRenderer(self.template_string, processes=2, chunk_size=7)
+        self.assertEqual(list(renderer.render(self.contexts(100))), self.expected(100))
+
+    def test_chunks(self):
+        renderer = BulkRenderer(self.template_string, processes=2, chunk_size=30)
+        chunks = list(renderer.render_chunks(self.contexts(100)))
+        self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10])
+        self.assertEqual(sum(chunks, []), self.expected(100))
+
+    def test_empty(self):
+        renderer = BulkRenderer(self.template_string, processes=1)
+        self.assertEqual(list(renderer.render([])), [])
+        self.assertEqual(renderer.stats.renders, 0)
+
+    def test_stats(self):
+        renderer = BulkRenderer(self.template_string, processes=2)
+        list(renderer.render(self.contexts(50)))
+        list(renderer.render(self.contexts(20)))
+        stats = renderer.stats
+        self.assertEqual(stats.renders, 70)
+        self.assertGreater(stats.seconds, 0)
+        self.assertAlmostEqual(stats.renders_per_second, 70 / stats.seconds)
+
+    def test_render_to_file(self):
+        renderer = BulkRenderer(self.template_string, processes=2, chunk_size=16)
+        f = io.StringIO()
+        stats = renderer.render_to_file(self.contexts(100), f, separator='\n')
+        self.assertEqual(f.getvalue(), ''.join(render + '\n' for render in self.expected(100)))
+        self.assertEqual(stats.renders, 100)
+
+    def test_render_to_path(self):
+        renderer = BulkRenderer(self.template_string, processes=2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.txt')
+            renderer.render_to_file(self.contexts(10), path)
+            with open(path) as f:
+                self.assertEqual(f.read(), ''.join(self.expected(10)))
+
+
+class LengthSink:
+    def __init__(self):
+        self.length = 0
+        self.writes = 0
+
+    def write(self, s):
+        self.length += len(s)
+        self.writes += 1
+
+
+class TestStreamTemplate(unittest.TestCase):
+    templates = [
+        '{{a}}',
+        '{% for x in xs %}{{forloop.counter}}/{{forloop.revcounter0}}:{{x}}{% if forloop.last %}.{% endif %}{% endfor %}',
+        '{% for x in xs reversed %}{% for y in xs %}{{forloop.parentloop.counter}}{{y}}{% endfor %}{% endfor %}',
+        '{% for x in empty %}{{x}}{% empty %}nothing{% endfor %}',
+        '{% for k, v in pairs %}{{k}}={{v}};{% endfor %}{{k}}',
+        '{% if a > 5 %}big{% elif a > 1 %}medium{% else %}small{% endif %}{% if missing.attr %}x{% endif %}',
+        '{% with b=a %}{% for x in xs %}{{b}}{% endfor %}{% endwith %}{{html}}{{html|safe}}',
+        '{% autoescape off %}{% for x in xs %}{{html}}{% endfor %}{% endautoescape %}{{html}}',
+        '{% block content %}{% for x in xs %}{{x}}{{block.name}}{% endfor %}{% endblock %}',
+    ]
+    context = {'a': 3, 'xs': [1, 2, 3], 'empty': [], 'pairs': [('a', 1), ('b', 2)], 'html': '<b>'}
+
+    def test_same_as_render(self):
+        for template_string in self.templates:
+            with self.subTest(template_string=template_string):
+                expected = render_template(template_string, dict(self.context))
+                for chunk_size in [1, 5, 10 ** 6]:
+                    actual = ''.join(stream_template(template_string, dict(self.context), chunk_size))
+                    self.assertEqual(actual, expected)
+
+    def test_extends(self):
+        renderer = TemplateRenderer()
+        base = renderer.get_template('<{% block a %}a{% endblock %}|{% block b %}{% for x in xs %}{{x}}{% endfor %}'
+                                     '{% endblock %}>')
+        middle = renderer.get_template('{% extends base %}{% block a %}[{{block.super}}]{% endblock %}')
+        template_string = '{% extends middle %}{% block b %}{% for x in xs %}{{block.super}}{% endfor %}{% endblock %}'
+        context = dict(self.context, base=base, middle=middle)
+        expected = renderer.render(template_string, dict(context))
+        self.assertEqual(expected, '<[a]|123123123>')
+        chunks = list(renderer.render_stream(template_string, dict(context), chunk_size=1))
+        self.assertEqual(''.join(chunks), expected)
+        self.assertGreater(len(chunks), 3)
+
+    def test_same_as_render_in_debug(self):
+        # the streaming mirrors the render methods of the installed Django, which is checked here in debug mode too
+        renderer = TemplateRenderer(Engine(debug=True))
+        base = renderer.get_template('<{% block a %}{% for x in xs %}{{x}}{% endfor %}{% endblock %}>')
+        for template_string in self.templates + ['{% extends base %}{% block a %}[{{block.super}}]{% endblock %}']:
+            with self.subTest(template_string=template_string):
+                context = dict(self.context, base=base)
+                expected = renderer.render(template_string, dict(context))
+                self.assertEqual(''.join(renderer.render_stream(template_string, dict(context), chunk_size=1)),
+                                 expected)
+
+    def test_errors_in_debug(self):
+        errors = [
+            '{% for a, b in xs %}{{a}}{% endfor %}',
+            '{% with y=1 %}\n{% for x in xs %}{{x|divisibleby:0}}{% endfor %}{% endwith %}',
+            '{% block content %}{% autoescape off %}\n\n{% for k, v, w in pairs %}{% endfor %}{% endautoescape %}'
+            '{% endblock %}',
+        ]
+        for debug in [False, True]:
+            renderer = TemplateRenderer(Engine(debug=debug))
+            for template_string in errors:
+                with self.subTest(debug=debug, template_string=template_string):
+                    with self.assertRaises(Exception) as expected:
+                        renderer.render(template_string, dict(self.context))
+                    with self.assertRaises(type(expected.exception)) as actual:
+                        list(renderer.render_stream(template_string, dict(self.context)))
+                    self.assertEqual(str(actual.exception), str(expected.exception))
+                    self.assertEqual(getattr(actual.exception, 'template_debug', None),
+                                     getattr(expected.exception, 'template_debug', None))
+                    self.assertEqual(hasattr(actual.exception, 'template_debug'), debug)
+
+    def test_wrapped_loops_are_streamed(self):
+        for wrapper in ['{% with y=1 %}', '{% autoescape off %}', '{% block content %}']:
+            end = '{% end' + wrapper.split()[1] + ' %}'
+            with self.subTest(wrapper=wrapper):
+                template_string = wrapper + '{% for x in xs %}{{x}}{% endfor %}' + end
+                chunks = list(stream_template(template_string, {'xs': range(1000)}, chunk_size=100))
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual(''.join(chunks), ''.join(map(str, range(1000))))
+
+    def test_chunk_size(self):
+        chunks = list(stream_template('{% for x in xs %}{{x}}{% endfor %}', {'xs': range(1000)}, chunk_size=100))
+        self.assertTrue(all(100 <= len(chunk) < 110 for chunk in chunks[:-1]))
+        self.assertEqual(''.join(chunks), ''.join(map(str, range(1000))))
+
+    def test_render_to_file(self):
+        f = io.StringIO()
+        TemplateRenderer().render_to_file('{% for x in xs %}{{x}}\n{% endfor %}', {'xs': range(10)}, f)
+        self.assertEqual(f.getvalue(), ''.join('{0}\n'.format(x) for x in range(10)))
+
+    def test_bounded_memory(self):
+        template_string = '{% for x in xs %}<li>{{x}} {{text}}</li>{% endfor %}'
+        context = {'xs': range(20000), 'text': 'x' * 50}
+        sink = LengthSink()
+        tracemalloc.start()
+        try:
+            TemplateRenderer().render_to_file(template_string, context, sink, chunk_size=4096)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(sink.length, 10 ** 6)
+        self.assertLess(peak, sink.length / 10)
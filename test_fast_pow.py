@@ -1,5 +1,11 @@
 from unittest import TestCase
+import functools
+
+import numpy as np
+
 from fast_pow import python_pow, slow_iter_pow, fast_iter_pow, slow_recursive_pow, fast_recursive_pow
+from fast_pow import monoid_pow, kary_pow, sliding_window_pow, mod_pow, matrix_pow, poly_mulmod, vectorized_pow
+from fast_pow import FixedBasePow, FixedBaseCache
 
 
 class PowTester:
@@ -55,4 +61,297 @@ class TestSlowRecursivePow(TestCase, PowTester):
 
 
 class TestFastRecursivePow(TestCase, PowTester):
-    func = fast_recursive_pow
\ No newline at end of file
+    func = fast_recursive_pow
+
+
+class TestMonoidPow(TestCase, PowTester):
+    func = monoid_pow
+
+
+class TestKaryPow(TestCase, PowTester):
+    func = kary_pow
+
+
+class TestKaryPowBinary(TestCase, PowTester):
+    func = functools.partial(kary_pow, k=1)
+
+
+class TestSlidingWindowPow(TestCase, PowTester):
+    func = sliding_window_pow
+
+
+class TestSlidingWindowPowOneBit(TestCase, PowTester):
+    func = functools.partial(sliding_window_pow, window=1)
+
+
+class CountingMul:
+    def __init__(self, mod):
+        self.count = 0
+        self.mod = mod
+
+    def __call__(self, a, b):
+        self.count += 1
+        return a * b % self.mod
+
+
+class TestGenericPow(TestCase):
+    def test_all_exponents(self):
+        for func in [monoid_pow, kary_pow, sliding_window_pow]:
+            for n in range(300):
+                with self.subTest(func=func.__name__, n=n):
+                    self.assertEqual(func(3, n), 3 ** n)
+
+    def test_custom_mul_and_identity(self):
+        def concat(a, b):
+            return a + b
+        for func in [monoid_pow, kary_pow, sliding_window_pow]:
+            with self.subTest(func=func.__name__):
+                self.assertEqual(func('ab', 5, concat, ''), 'ab' * 5)
+                self.assertEqual(func('ab', 0, concat, ''), '')
+
+    def test_negative_exponent(self):
+        for func in [monoid_pow, kary_pow, sliding_window_pow]:
+            with self.subTest(func=func.__name__):
+                with self.assertRaisesRegex(ValueError, "exponents must be non-negative"):
+                    func(2, -3)
+
+    def test_windows_need_fewer_multiplications(self):
+        n = 2 ** 1000 - 12345
+        mod = 10 ** 9 + 7
+        counts = {}
+        for func in [monoid_pow, kary_pow, sliding_window_pow]:
+            mul = CountingMul(mod)
+            self.assertEqual(func(3, n, mul), python_pow(3, n, mod))
+            counts[func.__name__] = mul.count
+        self.assertLess(counts['kary_pow'], counts['monoid_pow'])
+        self.assertLess(counts['sliding_window_pow'], counts['kary_pow'])
+
+    def test_mod_pow(self):
+        self.assertEqual(mod_pow(3, 10 ** 20, 10 ** 9 + 7), python_pow(3, 10 ** 20, 10 ** 9 + 7))
+
+    def test_modular_mul(self):
+        mod = 10 ** 9 + 7
+        actual = sliding_window_pow(3, 10 ** 20, lambda a, b: a * b % mod)
+        self.assertEqual(actual, python_pow(3, 10 ** 20, mod))
+
+
+def fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+class TestMatrixPow(TestCase):
+    def test_fib(self):
+        actual = matrix_pow([[1, 1], [1, 0]], 30)
+        self.assertEqual(actual[0, 1], fib(30))
+
+    def test_zero(self):
+        np.testing.assert_array_equal(matrix_pow([[2, 3], [4, 5]], 0), np.identity(2))
+
+    def test_mod(self):
+        mod = 10 ** 9 + 7
+        actual = matrix_pow(np.array([[1, 1], [1, 0]]), 1000, mod)
+        self.assertEqual(actual[0, 1], fib(1000) % mod)
+
+    def test_large_mod(self):
+        mod = 2 ** 61 - 1
+        actual = matrix_pow(np.array([[1, 1], [1, 0]]), 1000, mod)
+        self.assertEqual(actual[0, 1], fib(1000) % mod)
+
+    def test_generic_pow_of_matrices(self):
+        m = np.array([[1, 1], [1, 0]], dtype=object)
+        actual = sliding_window_pow(m, 200, np.dot, np.identity(2, dtype=object))
+        self.assertEqual(actual[0, 1], fib(200))
+
+
+class TestPolyMulmod(TestCase):
+    def test_fib(self):
+        # x^n mod (x^2 - x - 1) = F(n) x + F(n-1)
+        mul = poly_mulmod([-1, -1, 1])
+        for func in [monoid_pow, kary_pow, sliding_window_pow]:
+            with self.subTest(func=func.__name__):
+                self.assertEqual(func([0, 1], 100, mul, [1]), [fib(99), fib(100)])
+
+    def test_coefficients_mod_p(self):
+        mul = poly_mulmod([-1, -1, 1], p=1000)
+        self.assertEqual(monoid_pow([0, 1], 100, mul, [1]), [fib(99) % 1000, fib(100) % 1000])
+
+    def test_not_monic(self):
+        self.assertRaises(ValueError, poly_mulmod, [1, 2])
+
+    def test_mul(self):
+        mul = poly_mulmod([0, 0, 0, 1])
+        self.assertEqual(mul([1, 2], [3, 4]), [3, 10, 8])
+        self.assertEqual(mul([0, 1], [0, 0, 1]), [0, 0, 0])
+
+
+class TestVectorizedPow(TestCase, PowTester):
+    @classmethod
+    def get_actual(cls, x, n):
+        return vectorized_pow(x, n).item()
+
+    def test_arrays(self):
+        random = np.random.RandomState(0)
+        x = random.randint(-5, 6, 1000)
+        n = random.randint(0, 20, 1000)
+        actual = vectorized_pow(x, n)
+        self.assertEqual(actual.tolist(), [python_pow(int(a), int(b)) for a, b in zip(x, n)])
+
+    def test_broadcast(self):
+        actual = vectorized_pow(2, np.arange(10))
+        self.assertEqual(actual.tolist(), [2 ** i for i in range(10)])
+
+    def test_floats(self):
+        actual = vectorized_pow(np.array([0.5, 1.5, -2.0]), np.array([3, 10, 5]))
+        np.testing.assert_allclose(actual, [0.125, 1.5 ** 10, -32.0])
+
+    def test_mod(self):
+        random = np.random.RandomState(0)
+        mod = 10 ** 9 + 7
+        x = random.randint(0, 2 ** 62, 1000, dtype=np.int64)
+        n = random.randint(0, 2 ** 62, 1000, dtype=np.int64)
+        actual = vectorized_pow(x, n, mod)
+        self.assertEqual(actual.dtype, np.int64)
+        self.assertEqual(actual.tolist(), [python_pow(int(a), int(b), mod) for a, b in zip(x, n)])
+
+    def test_large_mod(self):
+        mod = 2 ** 61 - 1
+        x = np.array([3, 5, 2 ** 40])
+        n = np.array([10 ** 18, 0, 12345])
+        actual = vectorized_pow(x, n, mod)
+        self.assertEqual(actual.tolist(), [python_pow(int(a), int(b), mod) for a, b in zip(x, n)])
+
+    def test_narrow_integer_bases(self):
+        actual = vectorized_pow(np.array([123456, 999999], dtype=np.int32), np.array([5, 7]), 10 ** 9 + 7)
+        self.assertEqual(actual.tolist(), [869183595, 685928907])
+        self.assertEqual(vectorized_pow(np.array([200], dtype=np.uint8), np.array([3]), 251).tolist(), [python_pow(200, 3, 251)])
+        self.assertEqual(vectorized_pow(np.array([3], dtype=np.int8), np.array([10])).tolist(), [3 ** 10])
+        actual = vectorized_pow(np.array([2 ** 63 + 1], dtype=np.uint64), np.array([2]), 2 ** 64 + 13)
+        self.assertEqual(actual.tolist(), [python_pow(2 ** 63 + 1, 2, 2 ** 64 + 13)])
+
+    def test_mod_one(self):
+        self.assertEqual(vectorized_pow(np.array([3, 4]), np.array([0, 5]), 1).tolist(), [0, 0])
+
+    def test_negative_exponent(self):
+        self.assertRaises(ValueError, vectorized_pow, np.array([2]), np.array([-1]))
+
+
+class TestFixedBasePow(TestCase, PowTester):
+    @classmethod
+    def get_actual(cls, x, n):
+        return FixedBasePow(x)(n)
+
+
+class TestFixedBasePowWindow(TestCase, PowTester):
+    @classmethod
+    def get_actual(cls, x, n):
+        return FixedBasePow(x, window=3)(n)
+
+
+class TestFixedBasePowReuse(TestCase):
+    def test_many_exponents(self):
+        for window in [1, 2, 4]:
+            fixed = FixedBasePow(3, window=window)
+            for n in [100, 0, 5, 1000, 999, 1, 64]:
+                with self.subTest(window=window, n=n):
+                    self.assertEqual(fixed(n), 3 ** n)
+
+    def test_only_multiplications_after_precomputation(self):
+        mod = 10 ** 9 + 7
+        mul = CountingMul(mod)
+        fixed = FixedBasePow(3, mul, window=4)
+        n = 2 ** 256 - 1
+        self.assertEqual(fixed(n), python_pow(3, n, mod))
+        mul.count = 0
+        self.assertEqual(fixed(n - 2), python_pow(3, n - 2, mod))
+        self.assertEqual(mul.count, 256 // 4 - 1)
+
+    def test_max_size(self):
+        mod = 10 ** 9 + 7
+        for window in [1, 3]:
+            fixed = FixedBasePow(3, lambda a, b: a * b % mod, window=window, max_size=14)
+            for n in [2 ** 100 + 12345, 0, 7, 2 ** 14, 2 ** 15 - 1]:
+                with self.subTest(window=window, n=n):
+                    self.assertEqual(fixed(n), python_pow(3, n, mod))
+            self.assertLessEqual(fixed.size, 14)
+
+    def test_table_grows_with_exponent(self):
+        fixed = FixedBasePow(3)
+        fixed(2 ** 10)
+        self.assertEqual(fixed.size, 11)
+        fixed(5)
+        self.assertEqual(fixed.size, 11)
+
+
+class TestFixedBaseCache(TestCase):
+    def test_pow(self):
+        cache = FixedBaseCache()
+        for x in [2, 3, 2, 5]:
+            for n in [0, 7, 100]:
+                self.assertEqual(cache.pow(x, n), x ** n)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 9)
+
+    def test_eviction(self):
+        cache = FixedBaseCache(max_powers=20)
+        for x in range(2, 10):
+            self.assertEqual(cache.pow(x, 2 ** 9), x ** 2 ** 9)
+        self.assertLessEqual(cache.size, 20)
+        self.assertEqual(list(cache.tables), [8, 9])
+        self.assertEqual(cache.evictions, 6)
+        self.assertEqual(cache.size, sum(table.size for table in cache.tables.values()))
+
+    def test_single_table_is_bounded(self):
+        mod = 10 ** 9 + 7
+        cache = FixedBaseCache(max_powers=5, mul=lambda a, b: a * b % mod)
+        for n in [1000, 31, 32, 2 ** 100 + 7]:
+            self.assertEqual(cache.pow(3, n), python_pow(3, n, mod))
+        self.assertEqual(list(cache.tables), [3])
+        self.assertEqual(cache.size, 5)
+
+
+class TestStackSafety(TestCase):
+    def test_slow_recursive_pow_large_exponent(self):
+        self.assertEqual(slow_recursive_pow(3, 5000), 3 ** 5000)
+
+    def test_fast_recursive_pow_large_exponent(self):
+        n = 10 ** 20 + 3
+        mod = 10 ** 9 + 7
+        self.assertEqual(fast_recursive_pow(ModInt(3, mod), n).value, python_pow(3, n, mod))
+
+    def test_fast_recursive_pow_exponent_beyond_float_precision(self):
+        # halving 2^54 + 2 as a float would round 2^53 + 1 down
+        n = 2 ** 54 + 2
+        mod = 10 ** 9 + 7
+        self.assertEqual(fast_recursive_pow(ModInt(3, mod), n).value, python_pow(3, n, mod))
+
+    def test_recursive_pow_keeps_multiplication_order(self):
+        # non commutative: string concatenation
+        for func in [slow_recursive_pow, fast_recursive_pow]:
+            with self.subTest(func=func.__name__):
+                self.assertEqual(func(Word('ab'), 5).word, 'ab' * 5)
+
+
+class ModInt:
+    def __init__(self, value, mod):
+        self.value = value
+        self.mod = mod
+
+    def __mul__(self, other):
+        other = other.value if isinstance(other, ModInt) else other
+        return ModInt(self.value * other % self.mod, self.mod)
+
+    __rmul__ = __mul__
+
+
+class Word:
+    def __init__(self, word):
+        self.word = word
+
+    def __mul__(self, other):
+        return Word(self.word + (other.word if isinstance(other, Word) else ''))
+
+    def __rmul__(self, other):
+        return Word(self.word)
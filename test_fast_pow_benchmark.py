@@ -0,0 +1,48 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import fast_pow
+import fast_pow_benchmark
+
+
+class TestCountMultiplications(unittest.TestCase):
+    def test_slow(self):
+        self.assertEqual(fast_pow_benchmark.count_multiplications(fast_pow.slow_iter_pow, 3, 10), 10)
+
+    def test_fast(self):
+        # 13 = 0b1101: 3 multiplications into the result, and 3 squarings
+        self.assertEqual(fast_pow_benchmark.count_multiplications(fast_pow.fast_recursive_pow, 3, 13), 6)
+
+    def test_python_pow(self):
+        self.assertIsNone(fast_pow_benchmark.count_multiplications(fast_pow.python_pow, 3, 10))
+
+
+class TestMatrix(unittest.TestCase):
+    def test_variants_agree(self):
+        m = fast_pow_benchmark.OPERANDS['matrix']()
+        expected = fast_pow.python_pow(m, 7).array
+        for name, func in fast_pow_benchmark.VARIANTS.items():
+            with self.subTest(variant=name):
+                self.assertTrue((abs(func(m, 7).array - expected) < 1e-12).all())
+
+
+class TestRun(unittest.TestCase):
+    def test_results(self):
+        results = fast_pow_benchmark.run(['int', 'matrix'], [10, 2000], repeat=1)
+        slow = [r for r in results if r['variant'] in fast_pow_benchmark.SLOW_VARIANTS]
+        self.assertEqual({r['exponent'] for r in slow}, {10})
+        self.assertEqual(len(results), 2 * (len(fast_pow_benchmark.VARIANTS) * 2 - 2))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            with redirect_stdout(io.StringIO()) as stdout:
+                fast_pow_benchmark.main(['--operands', 'float', 'big_int', '--exponents', '100', '--output', output])
+            with open(output) as f:
+                results = json.load(f)
+        self.assertEqual(len(results), 2 * len(fast_pow_benchmark.VARIANTS))
+        self.assertEqual(len(stdout.getvalue().splitlines()), len(results))
@@ -1,7 +1,12 @@
 import infinite_fib
 import unittest
+import itertools
+import threading
+from operator import add
 from unittest import mock
 
+import numpy as np
+
 
 def take(elems, n):
     for i, elem in enumerate(elems):
@@ -89,3 +94,205 @@ class TestZipWith(unittest.TestCase):
         self.assertEqual(func.call_args_list[1][0], (1, 5))
         self.assertEqual(func.call_args_list[2][0], (2, 6))
         self.assertEqual(actual, [0, 5, 12])
+
+
+class TestFib(unittest.TestCase):
+    def test_small(self):
+        expected = list(take(infinite_fib.itertive_infinite_fib(), 100))
+        actual = [infinite_fib.fib(n) for n in range(100)]
+        self.assertEqual(actual, expected)
+
+    def test_large(self):
+        n = 10 ** 4
+        expected = next(itertools.islice(infinite_fib.itertive_infinite_fib(), n, None))
+        self.assertEqual(infinite_fib.fib(n), expected)
+
+    def test_negative(self):
+        self.assertRaises(ValueError, lambda: infinite_fib.fib(-1))
+
+
+class TestFibRange(unittest.TestCase):
+    def test_from_zero(self):
+        expected = list(take(infinite_fib.itertive_infinite_fib(), 20))
+        self.assertEqual(list(infinite_fib.fib_range(0, 20)), expected)
+
+    def test_offset(self):
+        expected = [infinite_fib.fib(n) for n in range(1000, 1010)]
+        self.assertEqual(list(infinite_fib.fib_range(1000, 1010)), expected)
+
+    def test_empty(self):
+        self.assertEqual(list(infinite_fib.fib_range(5, 5)), [])
+
+
+class TestRecursiveInfiniteFibLength(unittest.TestCase):
+    def test_beyond_recursion_limit(self):
+        n = 20000
+        actual = next(itertools.islice(infinite_fib.recursive_infinite_fib(), n, None))
+        self.assertEqual(actual, infinite_fib.fib(n))
+
+
+class TestStream(unittest.TestCase):
+    def test_shared_iterators(self):
+        s = infinite_fib.Stream(lookback=3)
+        s.define(iter(range(5)))
+        it1, it2 = iter(s), iter(s)
+        self.assertEqual(next(it1), 0)
+        self.assertEqual(next(it1), 1)
+        self.assertEqual(list(it2), [0, 1, 2, 3, 4])
+        self.assertEqual(list(it1), [2, 3, 4])
+
+    def test_out_of_lookback(self):
+        s = infinite_fib.Stream(lookback=2)
+        s.define(itertools.count())
+        it1, it2 = iter(s), iter(s)
+        list(take(it1, 3))
+        self.assertRaises(IndexError, lambda: next(it2))
+
+    def test_self_reference(self):
+        powers = infinite_fib.Stream(lookback=1)
+        powers.define(itertools.chain([1], infinite_fib.zip_with(add, powers, powers)))
+        self.assertEqual(list(take(powers, 6)), [1, 2, 4, 8, 16, 32])
+
+    def test_undefined(self):
+        self.assertRaises(RuntimeError, lambda: next(iter(infinite_fib.Stream(lookback=1))))
+
+
+class TestTail(unittest.TestCase):
+    def test_list(self):
+        self.assertEqual(list(infinite_fib.tail([1, 2, 3])), [2, 3])
+
+
+class TestPisanoPeriod(unittest.TestCase):
+    def test_known_periods(self):
+        # https://oeis.org/A001175
+        expected = [1, 3, 8, 6, 20, 24, 16, 12, 24, 60, 10, 24]
+        actual = [infinite_fib.pisano_period(m) for m in range(1, 13)]
+        self.assertEqual(actual, expected)
+
+    def test_max_period(self):
+        self.assertIsNone(infinite_fib.pisano_period(10, max_period=59))
+        self.assertEqual(infinite_fib.pisano_period(10, max_period=60), 60)
+
+
+class TestFibMod(unittest.TestCase):
+    def assert_fib_mod(self, n, m):
+        actual = infinite_fib.fib_mod(n, m)
+        expected = [infinite_fib.fib(int(i)) % m for i in n]
+        self.assertEqual(list(actual), expected)
+
+    def test_table(self):
+        self.assert_fib_mod(np.arange(200), 10)
+
+    def test_large_indices(self):
+        n = np.array([10 ** 6, 10 ** 6 + 1, 123456789])
+        # the pisano period of 1000 is 1500
+        expected = [infinite_fib.fib(int(i) % 1500) % 1000 for i in n]
+        self.assertEqual(list(infinite_fib.fib_mod(n, 1000)), expected)
+
+    def test_doubling(self):
+        # the pisano period of 10^9 + 7 is longer than MAX_TABLE_PERIOD
+        self.assert_fib_mod(np.array([0, 1, 2, 1000, 12345]), 10 ** 9 + 7)
+
+    def test_large_modulus(self):
+        self.assert_fib_mod(np.array([0, 1, 1000, 12345], dtype=object), 10 ** 20 + 7)
+
+    def test_scalar(self):
+        self.assertEqual(infinite_fib.fib_mod(10 ** 30, 10), infinite_fib.fib(10 ** 30 % 60) % 10)
+
+    def test_modulus_one(self):
+        self.assertEqual(list(infinite_fib.fib_mod(np.arange(5), 1)), [0] * 5)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: infinite_fib.fib_mod(-1, 10))
+        self.assertRaises(ValueError, lambda: infinite_fib.fib_mod(1, 0))
+        self.assertRaises(TypeError, lambda: infinite_fib.fib_mod(1.5, 10))
+
+
+class CountingIterable:
+    def __init__(self, elems):
+        self.elems = iter(elems)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        elem = next(self.elems)
+        self.count += 1
+        return elem
+
+
+class TestLazyList(unittest.TestCase):
+    def test_memoized(self):
+        elems = CountingIterable(range(100))
+        lst = infinite_fib.LazyList(elems)
+        self.assertEqual(lst.take(10), list(range(10)))
+        self.assertEqual(lst.take(10), list(range(10)))
+        self.assertEqual(lst[5], 5)
+        self.assertEqual(elems.count, 10)
+
+    def test_indexing(self):
+        lst = infinite_fib.LazyList(itertools.count())
+        self.assertEqual(lst[7], 7)
+        self.assertEqual(lst[3], 3)
+        self.assertRaises(IndexError, lambda: lst[-1])
+        self.assertRaises(IndexError, lambda: infinite_fib.LazyList([1, 2])[2])
+
+    def test_slicing(self):
+        lst = infinite_fib.LazyList(itertools.count())
+        self.assertEqual(list(lst[2:6]), [2, 3, 4, 5])
+        self.assertEqual(list(lst[2:10:3]), [2, 5, 8])
+        self.assertEqual(lst[5:].take(3), [5, 6, 7])
+        self.assertEqual(list(lst[6:2]), [])
+
+    def test_derived(self):
+        elems = CountingIterable(itertools.count())
+        lst = infinite_fib.LazyList(elems)
+        self.assertEqual(lst.tail().take(3), [1, 2, 3])
+        self.assertEqual(lst.map(lambda x: x * x).take(4), [0, 1, 4, 9])
+        self.assertEqual(lst.zip_with(add, lst.tail()).take(3), [1, 3, 5])
+        self.assertEqual(elems.count, 4)
+
+    def test_self_reference(self):
+        fibs = infinite_fib.LazyList()
+        fibs.define(itertools.chain([0, 1], fibs.zip_with(add, fibs.tail())))
+        self.assertEqual(fibs.take(20), list(infinite_fib.fib_range(0, 20)))
+        self.assertEqual(fibs[5000], infinite_fib.fib(5000))
+
+    def test_retention(self):
+        lst = infinite_fib.LazyList(itertools.count(), retention=3)
+        self.assertEqual(lst[100], 100)
+        self.assertEqual(lst[98], 98)
+        self.assertRaises(IndexError, lambda: lst[97])
+
+    def test_threads(self):
+        elems = CountingIterable(range(10000))
+        lst = infinite_fib.LazyList(elems)
+        results = []
+
+        def consume():
+            results.append(list(lst))
+
+        threads = [threading.Thread(target=consume) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [list(range(10000))] * 4)
+        self.assertEqual(elems.count, 10000)
+
+    def test_threads_with_derived_list(self):
+        for _ in range(5):
+            fibs = infinite_fib.LazyList()
+            fibs_tail = fibs.tail()
+            fibs.define(itertools.chain([0, 1], fibs.zip_with(add, fibs_tail)))
+            results = {}
+            threads = [threading.Thread(target=lambda name, lst: results.update({name: lst[3000]}), args=args,
+                                        daemon=True)
+                       for args in [('fibs', fibs), ('tail', fibs_tail)]]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+                self.assertFalse(thread.is_alive(), "deadlocked")
+            self.assertEqual(results, {'fibs': infinite_fib.fib(3000), 'tail': infinite_fib.fib(3001)})